@@ -6,17 +6,59 @@ Parallel Screen Capture Analysis
 """
 
 import os
+
+# Keep each tesseract run single-threaded: parallelism comes from our OCR worker
+# processes, and tesseract's default OpenMP threads would oversubscribe the CPU.
+# These must be set before pytesseract is imported; setdefault lets users override.
+os.environ.setdefault("OMP_THREAD_LIMIT", "1")
+os.environ.setdefault("OMP_NUM_THREADS", "1")
+os.environ.setdefault("MKL_NUM_THREADS", "1")
+
+import re
 import json
+import mmap
 import time
 import hashlib
 import argparse
+import atexit
+import locale
+import sqlite3
 from datetime import datetime, timedelta
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, Future, wait, FIRST_COMPLETED
 import threading
-from PIL import Image
+from PIL import Image, ImageStat
 import pytesseract
 import multiprocessing
 import requests
+from requests.adapters import HTTPAdapter
+
+# tesserocr requires the C locale to be set before it is imported
+locale.setlocale(locale.LC_ALL, 'C')
+
+# Try to import tesserocr (in-process tesseract API), falling back to pytesseract
+try:
+    import tesserocr
+    TESSEROCR_AVAILABLE = True
+except ImportError:
+    TESSEROCR_AVAILABLE = False
+    print("Warning: tesserocr not available, falling back to pytesseract (slower)")
+
+# Try to import pillow-heif so HEIC screenshots (ACTIVITY_LENS_IMAGE_FORMAT=heic
+# in screen-capture.py) can be opened for OCR
+try:
+    from pillow_heif import register_heif_opener
+    register_heif_opener()
+    HEIF_AVAILABLE = True
+except ImportError:
+    HEIF_AVAILABLE = False
+
+# Try to import orjson (much faster JSON encoding), falling back to the json module
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
 
 # Try to import psutil, but make it optional
 try:
@@ -43,21 +85,53 @@ def get_date_paths(date_str=None):
         current_date = datetime.now().strftime('%Y%m%d')
     
     input_dir = os.path.join(CACHE_DIR, f'screen-captures-{current_date}')
-    output_json = os.path.join(CACHE_DIR, f'screen_captures_ocr-{current_date}.json')
+    output_json = os.path.join(CACHE_DIR, f'screen_captures_ocr-{current_date}.jsonl')
     return input_dir, output_json
 
 # Get current date-based paths
 input_dir, output_json = get_date_paths()
 prompt_file = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'summarize_screen_text_prompt.txt')
-summary_cache_file = os.path.join(CACHE_DIR, 'summary_cache.json')
+summary_cache_file = os.path.join(CACHE_DIR, 'summary_cache.db')
+legacy_summary_cache_file = os.path.join(CACHE_DIR, 'summary_cache.json')
+ocr_cache_dir = os.path.join(CACHE_DIR, 'ocr_cache')
+legacy_ocr_cache_file = os.path.join(CACHE_DIR, 'ocr_cache.json')
+
+def load_prompt_template():
+    """Load the summarization prompt template, falling back to a default."""
+    try:
+        return Path(prompt_file).read_text(encoding='utf-8').strip()
+    except FileNotFoundError:
+        return "Summarize this text in 1-2 sentences: {text}"
+
+# The prompt is static, so read it once rather than on every summary
+PROMPT_TEMPLATE = load_prompt_template()
 
 # Configuration - Adaptive based on system capabilities
-MAX_OCR_WORKERS = min(4, multiprocessing.cpu_count())
-MAX_SUMMARY_WORKERS = 2 #min(2, max(1, MAX_OCR_WORKERS // 2))
-BATCH_SIZE = 10  # Process in smaller batches to reduce memory pressure
-SUMMARY_SEMAPHORE = threading.Semaphore(MAX_SUMMARY_WORKERS)  # Control summarization concurrency
+MAX_OCR_WORKERS = multiprocessing.cpu_count()  # tesseract is single-threaded (OMP_THREAD_LIMIT=1)
+# Match in-flight summaries to the number of requests the Ollama server runs in
+# parallel; more would just queue on the server
+MAX_SUMMARY_WORKERS = max(1, int(os.environ.get('OLLAMA_NUM_PARALLEL', 2)))
+SUMMARY_MAX_CHARS = 4000  # Screen text sent to Ollama (~1000 tokens) after compaction
+# Ollama options, tunable per machine: a smaller context/batch uses less VRAM
+SUMMARY_NUM_CTX = int(os.environ.get('ACTIVITY_LENS_NUM_CTX', 4096))  # Prefill time grows with context
+SUMMARY_NUM_PREDICT = int(os.environ.get('ACTIVITY_LENS_NUM_PREDICT', 100))  # Limit output length
+SUMMARY_NUM_BATCH = os.environ.get('ACTIVITY_LENS_BATCH_SIZE')  # Prompt batch size; Ollama's default if unset
+OCR_LANG = 'eng'  # Tesseract language model, loaded once per OCR worker
+OCR_OEM = 1  # LSTM engine only; skips running the legacy engine alongside it
+OCR_MAX_SIZE = (2560, 1600)  # Downscale larger (e.g. Retina) captures to fit before OCR
+SUMMARY_CACHE_FLUSH_SECONDS = 30  # Background save interval for new summary cache entries
+PROGRESS_SAVE_INTERVAL = 10  # Save progress after this many completions...
+PROGRESS_SAVE_SECONDS = 10  # ...or after this many seconds, whichever comes first
+MEMORY_CHECK_INTERVAL = 1.0  # Reuse a memory reading for this many seconds
 SAVE_LOCK = threading.Lock()  # Prevent concurrent file saves
 
+# Shared HTTP session so summary requests reuse keep-alive connections to Ollama
+# instead of opening a new one per call
+OLLAMA_URL = 'http://localhost:11434'
+OLLAMA_KEEP_ALIVE = -1  # Keep the model loaded between requests
+OLLAMA_SESSION = requests.Session()
+OLLAMA_SESSION.mount('http://', HTTPAdapter(pool_connections=MAX_SUMMARY_WORKERS, pool_maxsize=MAX_SUMMARY_WORKERS))
+
 # Progress tracking
 progress_lock = threading.Lock()
 ocr_completed = 0
@@ -67,67 +141,314 @@ start_time = None
 # Global variable for existing data (will be loaded in main function)
 existing_data = []
 
-# Load summary cache
-def load_summary_cache():
+# Summary cache is loaded once and kept in memory; new entries are written to the
+# SQLite cache by a background flusher and at exit rather than after every summary
+SUMMARY_CACHE = None
+SUMMARY_CACHE_LOCK = threading.Lock()
+summary_cache_pending = {}  # Entries not yet written to disk
+
+# Summaries currently being requested, keyed by normalized hash, so threads that
+# get the same content wait for one Ollama request instead of sending their own
+SUMMARY_INFLIGHT = {}
+SUMMARY_INFLIGHT_LOCK = threading.Lock()
+
+# Debounced progress saving
+progress_unsaved = 0
+last_progress_save = 0.0
+
+# Last memory reading as (timestamp, percent), refreshed at most every MEMORY_CHECK_INTERVAL
+memory_reading = None
+memory_reading_lock = threading.Lock()
+
+# Per-process tesseract API, created once by init_ocr_worker in each OCR worker
+worker_tess_api = None
+
+def load_cache_file(cache_file, description):
+    """Load a JSON cache file, creating it (or recovering from corruption) as needed."""
     try:
-        with open(summary_cache_file, 'r', encoding='utf-8') as f:
+        with open(cache_file, 'r', encoding='utf-8') as f:
             return json.load(f)
     except FileNotFoundError:
         # Create empty cache file if it doesn't exist
         try:
             # Ensure cache directory exists
-            os.makedirs(os.path.dirname(summary_cache_file), exist_ok=True)
+            os.makedirs(os.path.dirname(cache_file), exist_ok=True)
             # Create empty cache file
-            with open(summary_cache_file, 'w', encoding='utf-8') as f:
+            with open(cache_file, 'w', encoding='utf-8') as f:
                 json.dump({}, f)
-            print(f"Created new summary cache file: {summary_cache_file}")
+            print(f"Created new {description} cache file: {cache_file}")
             return {}
         except Exception as e:
-            print(f"Warning: Could not create summary cache file: {e}")
+            print(f"Warning: Could not create {description} cache file: {e}")
             return {}
     except json.JSONDecodeError as e:
-        print(f"Warning: Corrupted summary cache file, starting fresh: {e}")
+        print(f"Warning: Corrupted {description} cache file, starting fresh: {e}")
         # Backup the corrupted file
         import shutil
-        backup_file = summary_cache_file + '.backup'
+        backup_file = cache_file + '.backup'
         try:
-            shutil.copy2(summary_cache_file, backup_file)
+            shutil.copy2(cache_file, backup_file)
             print(f"Backed up corrupted cache to: {backup_file}")
         except:
             pass
         return {}
 
-def save_summary_cache(cache):
-    """Thread-safe function to save summary cache."""
+def dump_jsonl(entries):
+    """Serialize entries to UTF-8 JSON Lines bytes, using orjson when available."""
+    if ORJSON_AVAILABLE:
+        return b''.join(orjson.dumps(entry) + b'\n' for entry in entries)
+    return ''.join(json.dumps(entry, ensure_ascii=False) + '\n' for entry in entries).encode('utf-8')
+
+def load_entries(path):
+    """Load capture entries from a JSON Lines file.
+
+    Falls back to the .json array file written by older versions of
+    screen-capture.py when no .jsonl file exists yet.
+    """
+    parse = orjson.loads if ORJSON_AVAILABLE else json.loads
+    legacy_path = os.path.splitext(path)[0] + '.json'
+    if not os.path.exists(path) and os.path.exists(legacy_path):
+        with open(legacy_path, 'rb') as f:
+            return parse(f.read())
+    entries = []
+    with open(path, 'rb') as f:
+        for line_number, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            try:
+                entries.append(parse(line))
+            # A torn write leaves a partial line; orjson.JSONDecodeError,
+            # json.JSONDecodeError and UnicodeDecodeError are all ValueErrors
+            except ValueError:
+                print(f"Warning: Skipping unreadable line {line_number} in {path}")
+    return entries
+
+def set_aside_legacy_log(path):
+    """Rename the day's legacy .json log once its entries have been written to path.
+
+    Otherwise screen-capture.py would fold the legacy entries into the
+    JSON Lines log a second time on its next append.
+    """
+    legacy_path = os.path.splitext(path)[0] + '.json'
+    if os.path.exists(legacy_path):
+        os.replace(legacy_path, legacy_path + '.migrated')
+
+def atomic_write(path, data, fsync=True):
+    """Write bytes to path via a temporary file, fsync and os.replace.
+
+    Readers see either the old file or the complete new one, never a
+    truncated file from a crash mid-write. Pass fsync=False for files that
+    can be regenerated, where losing the latest write is harmless.
+    """
+    temp_file = path + '.tmp'
+    with open(temp_file, 'wb') as f:
+        f.write(data)
+        if fsync:
+            f.flush()
+            os.fsync(f.fileno())
+    os.replace(temp_file, path)
+
+def connect_summary_db():
+    """Open the SQLite summary cache, creating the table if needed."""
+    os.makedirs(os.path.dirname(summary_cache_file), exist_ok=True)
+    conn = sqlite3.connect(summary_cache_file)
+    try:
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('PRAGMA synchronous=NORMAL')
+        conn.execute('CREATE TABLE IF NOT EXISTS summaries (hash TEXT PRIMARY KEY, summary TEXT NOT NULL)')
+    except sqlite3.Error:
+        conn.close()
+        raise
+    return conn
+
+def migrate_legacy_summary_cache(conn):
+    """Import summaries from the old JSON cache file once, then set it aside."""
+    if not os.path.exists(legacy_summary_cache_file):
+        return
+    
+    legacy_cache = load_cache_file(legacy_summary_cache_file, 'legacy summary')
+    with conn:
+        conn.executemany('INSERT OR IGNORE INTO summaries (hash, summary) VALUES (?, ?)', legacy_cache.items())
+    os.replace(legacy_summary_cache_file, legacy_summary_cache_file + '.migrated')
+    print(f"Migrated {len(legacy_cache)} cached summaries to {summary_cache_file}")
+
+# Load summary cache
+def load_summary_cache():
+    """Load all cached summaries from the SQLite cache."""
+    try:
+        conn = connect_summary_db()
+        try:
+            migrate_legacy_summary_cache(conn)
+            return dict(conn.execute('SELECT hash, summary FROM summaries'))
+        finally:
+            conn.close()
+    except sqlite3.DatabaseError as e:
+        print(f"Warning: Corrupted summary cache, starting fresh: {e}")
+        # Move the corrupted database aside so a new one can be created
+        backup_file = summary_cache_file + '.backup'
+        try:
+            os.replace(summary_cache_file, backup_file)
+            print(f"Backed up corrupted cache to: {backup_file}")
+        except OSError:
+            pass
+        return {}
+    except Exception as e:
+        print(f"Warning: Could not load summary cache: {e}")
+        return {}
+
+def save_summary_cache(entries):
+    """Write summary cache entries to SQLite, one row per entry."""
     with SAVE_LOCK:
         try:
-            # Ensure cache directory exists
-            os.makedirs(os.path.dirname(summary_cache_file), exist_ok=True)
-            with open(summary_cache_file, 'w', encoding='utf-8') as f:
-                json.dump(cache, f, indent=2, ensure_ascii=False)
+            conn = connect_summary_db()
+            try:
+                with conn:
+                    conn.executemany('INSERT OR REPLACE INTO summaries (hash, summary) VALUES (?, ?)', entries.items())
+            finally:
+                conn.close()
+            return True
         except Exception as e:
             print(f"Warning: Could not save summary cache: {e}")
+            return False
+
+def get_summary_cache():
+    """Return the in-memory summary cache, loading it from disk on first use."""
+    global SUMMARY_CACHE
+    with SUMMARY_CACHE_LOCK:
+        if SUMMARY_CACHE is None:
+            SUMMARY_CACHE = load_summary_cache()
+        return SUMMARY_CACHE
+
+def update_summary_cache(content_hash, summary):
+    """Record a summary in the in-memory cache; it is persisted by flush_summary_cache."""
+    cache = get_summary_cache()
+    with SUMMARY_CACHE_LOCK:
+        cache[content_hash] = summary
+        summary_cache_pending[content_hash] = summary
+
+def flush_summary_cache():
+    """Write summaries added since the last flush to the SQLite cache."""
+    global summary_cache_pending
+    with SUMMARY_CACHE_LOCK:
+        if not summary_cache_pending:
+            return
+        pending = summary_cache_pending
+        summary_cache_pending = {}
+    
+    if not save_summary_cache(pending):
+        # Keep the entries so the next flush tries again
+        with SUMMARY_CACHE_LOCK:
+            for content_hash, summary in pending.items():
+                summary_cache_pending.setdefault(content_hash, summary)
+
+def start_summary_cache_flusher(interval=SUMMARY_CACHE_FLUSH_SECONDS):
+    """Flush the summary cache every `interval` seconds on a daemon thread."""
+    stop_event = threading.Event()
+    
+    def flush_loop():
+        while not stop_event.wait(interval):
+            flush_summary_cache()
+    
+    threading.Thread(target=flush_loop, daemon=True).start()
+    return stop_event
+
+# OCR cache maps a hash of the PNG bytes to its OCR text, so unchanged captures
+# (e.g. an idle screen) and re-runs after interruptions skip tesseract entirely.
+# Each entry is its own <hash>.txt file, so adding one never rewrites the others.
+def get_ocr_cache_path(png_hash):
+    return os.path.join(ocr_cache_dir, f'{png_hash}.txt')
+
+def load_cached_ocr_text(png_hash):
+    """Return the cached OCR text for a PNG hash, or None if it isn't cached."""
+    try:
+        return read_text_file(get_ocr_cache_path(png_hash))
+    except (OSError, UnicodeDecodeError):
+        return None
+
+def save_cached_ocr_text(png_hash, text):
+    """Store OCR text for a PNG hash in the cache directory."""
+    try:
+        os.makedirs(ocr_cache_dir, exist_ok=True)
+        # OCR can always be rerun, so skip the per-entry fsync
+        atomic_write(get_ocr_cache_path(png_hash), text.encode('utf-8'), fsync=False)
+    except OSError as e:
+        print(f"Warning: Could not save OCR cache entry: {e}")
+
+def migrate_legacy_ocr_cache():
+    """Split the old single-file JSON OCR cache into per-hash files once."""
+    if not os.path.exists(legacy_ocr_cache_file):
+        return
+    
+    legacy_cache = load_cache_file(legacy_ocr_cache_file, 'legacy OCR')
+    for png_hash, text in legacy_cache.items():
+        save_cached_ocr_text(png_hash, text)
+    os.replace(legacy_ocr_cache_file, legacy_ocr_cache_file + '.migrated')
+    print(f"Migrated {len(legacy_cache)} cached OCR results to {ocr_cache_dir}")
+
+def get_file_hash(filepath):
+    """Hash a file's bytes with blake2b (faster than md5); returns None if unreadable."""
+    try:
+        with open(filepath, 'rb') as f:
+            return hashlib.blake2b(f.read(), digest_size=16).hexdigest()
+    except OSError:
+        return None
+
+def get_file_sizes(directory):
+    """Return {filename: size} for a directory using a single scandir pass."""
+    sizes = {}
+    with os.scandir(directory) as it:
+        for dir_entry in it:
+            if dir_entry.is_file():
+                sizes[dir_entry.name] = dir_entry.stat().st_size
+    return sizes
 
 def save_progress_safe(data):
     """Thread-safe function to save progress to JSON file."""
     with SAVE_LOCK:
         try:
-            with open(output_json, 'w', encoding='utf-8') as f:
-                json.dump(data, f, indent=2, ensure_ascii=False)
+            atomic_write(output_json, dump_jsonl(data))
+            set_aside_legacy_log(output_json)
             return True
         except Exception as e:
             print(f"  Warning: Could not save progress: {e}")
             return False
 
+def save_progress_debounced(data):
+    """Save progress every PROGRESS_SAVE_INTERVAL completions or PROGRESS_SAVE_SECONDS seconds."""
+    global progress_unsaved, last_progress_save
+    
+    progress_unsaved += 1
+    now = time.time()
+    if progress_unsaved >= PROGRESS_SAVE_INTERVAL or now - last_progress_save >= PROGRESS_SAVE_SECONDS:
+        if save_progress_safe(data):
+            progress_unsaved = 0
+            last_progress_save = now
+
+def flush_progress():
+    """Save progress if any completions have not been written to disk yet."""
+    global progress_unsaved, last_progress_save
+    
+    if progress_unsaved and save_progress_safe(existing_data):
+        progress_unsaved = 0
+        last_progress_save = time.time()
+
 def check_memory_usage():
     """Check current memory usage and warn if too high."""
+    global memory_reading
+    
     if not PSUTIL_AVAILABLE:
         return True  # Skip memory checks if psutil not available
     
     try:
-        memory = psutil.virtual_memory()
-        if memory.percent > 95:  # Only stop at 95% (much more reasonable)
-            print(f"⚠️  Very high memory usage: {memory.percent:.1f}%")
+        # psutil.virtual_memory() is not free, so reuse a recent reading
+        with memory_reading_lock:
+            now = time.time()
+            if memory_reading is None or now - memory_reading[0] >= MEMORY_CHECK_INTERVAL:
+                memory_reading = (now, psutil.virtual_memory().percent)
+            percent = memory_reading[1]
+        
+        if percent > 95:  # Only stop at 95% (much more reasonable)
+            print(f"⚠️  Very high memory usage: {percent:.1f}%")
             return False
         return True
     except Exception:
@@ -156,42 +477,64 @@ def process_with_retry(func, *args, max_retries=3):
             print(f"  Retry {attempt + 1}/{max_retries} in {wait_time}s: {e}")
             time.sleep(wait_time)
 
-def get_normalized_content_hash(text_content):
-    """Generate a normalized hash of the text content for fuzzy matching."""
-    import re
-    
+# Patterns for normalize_content, compiled once since it runs for every OCR result
+WHITESPACE_RE = re.compile(r'\s+')
+AM_PM_RE = re.compile(r'\b(AM|PM)\b', re.IGNORECASE)
+TIME_RE = re.compile(r'\d{1,2}:\d{2}(:\d{2})?')
+SLASH_DATE_RE = re.compile(r'\d{1,2}/\d{1,2}/\d{2,4}')
+ISO_DATE_RE = re.compile(r'\d{4}-\d{1,2}-\d{1,2}')
+UI_WORDS_RE = re.compile(r'\b(close|minimize|maximize|window|button|tab)\b')
+SYSTEM_WORDS_RE = re.compile(r'\b(loading|saving|processing|please wait)\b')
+PUNCTUATION_RE = re.compile(r'[^\w\s]')
+
+def normalize_content(text_content):
+    """Normalize text content so trivial variations (case, timestamps, UI text) compare equal."""
     # Normalize the text content
     normalized = text_content.lower()
     
     # Remove extra whitespace
-    normalized = re.sub(r'\s+', ' ', normalized)
+    normalized = WHITESPACE_RE.sub(' ', normalized)
     
     # Remove timestamps and dates BEFORE removing punctuation
     # Remove standalone AM/PM first
-    normalized = re.sub(r'\b(AM|PM)\b', '', normalized, flags=re.IGNORECASE)
+    normalized = AM_PM_RE.sub('', normalized)
     # Then remove time patterns
-    normalized = re.sub(r'\d{1,2}:\d{2}(:\d{2})?', '', normalized)
-    normalized = re.sub(r'\d{1,2}/\d{1,2}/\d{2,4}', '', normalized)
-    normalized = re.sub(r'\d{4}-\d{1,2}-\d{1,2}', '', normalized)
+    normalized = TIME_RE.sub('', normalized)
+    normalized = SLASH_DATE_RE.sub('', normalized)
+    normalized = ISO_DATE_RE.sub('', normalized)
     
     # Remove common UI elements that might vary
-    normalized = re.sub(r'\b(close|minimize|maximize|window|button|tab)\b', '', normalized)
+    normalized = UI_WORDS_RE.sub('', normalized)
     
     # Remove common system text
-    normalized = re.sub(r'\b(loading|saving|processing|please wait)\b', '', normalized)
+    normalized = SYSTEM_WORDS_RE.sub('', normalized)
     
     # Remove common punctuation that doesn't affect meaning (AFTER removing timestamps)
-    normalized = re.sub(r'[^\w\s]', '', normalized)
+    normalized = PUNCTUATION_RE.sub('', normalized)
     
     # Final cleanup
-    normalized = normalized.strip()
-    
-    return hashlib.md5(normalized.encode('utf-8')).hexdigest()
+    return normalized.strip()
+
+def hash_normalized_content(normalized):
+    """Hash UTF-8 bytes returned by normalize_content."""
+    # blake2b is considerably faster than md5 on large OCR text
+    return hashlib.blake2b(normalized, digest_size=16).hexdigest()
+
+def get_normalized_content_hash(text_content):
+    """Generate a normalized hash of the text content for fuzzy matching."""
+    return hash_normalized_content(normalize_content(text_content).encode('utf-8'))
+
+def compact_screen_text(text_content):
+    """Collapse whitespace, drop repeated lines and truncate OCR text for the prompt."""
+    # Screen text repeats a lot (menus, sidebars, tab titles); dict keeps first-seen order
+    lines = dict.fromkeys(' '.join(line.split()) for line in text_content.splitlines())
+    lines.pop('', None)
+    return '\n'.join(lines)[:SUMMARY_MAX_CHARS]
 
 def check_ollama_status():
     """Check if Ollama is running and what models are available."""
     try:
-        response = requests.get('http://localhost:11434/api/tags', timeout=5)
+        response = requests.get(f'{OLLAMA_URL}/api/tags', timeout=5)
         if response.status_code == 200:
             models = response.json().get('models', [])
             available_models = [model['name'] for model in models]
@@ -206,219 +549,266 @@ def check_ollama_status():
 
 def summarize_with_ollama(text_content, app_name="", window_title="", model_to_use=None):
     """Summarize text using Ollama API with normalized hash caching."""
-    # Load cache
-    summary_cache = load_summary_cache()
+    # In-memory cache (loaded from disk once)
+    summary_cache = get_summary_cache()
     
-    # Try normalized hash matching
-    normalized_hash = get_normalized_content_hash(text_content)
+    # Try normalized hash matching; normalize once, since a miss hashes the text twice
+    normalized = normalize_content(text_content).encode('utf-8')
+    normalized_hash = hash_normalized_content(normalized)
     if normalized_hash in summary_cache:
         print(f"  Using cached summary for {normalized_hash[:8]}...")
         return summary_cache[normalized_hash], True  # Return (summary, is_cache_hit)
     
+    # Fall back to the md5 key written by older versions and move it to the new key.
+    # The cache holds only digests, so md5 keys can't be re-keyed when it is loaded
+    legacy_hash = hashlib.md5(normalized).hexdigest()
+    if legacy_hash in summary_cache:
+        print(f"  Using cached summary for {legacy_hash[:8]}...")
+        summary = summary_cache[legacy_hash]
+        update_summary_cache(normalized_hash, summary)
+        return summary, True
+    
     # Skip summarization for very short content (less than 250 characters)
     if len(text_content.strip()) < 250:
         print(f"  Content too short ({len(text_content.strip())} chars), skipping summarization")
         # Cache empty summary to avoid repeated API calls for same short content
-        summary_cache[normalized_hash] = ""
-        save_summary_cache(summary_cache)
+        update_summary_cache(normalized_hash, "")
         return "", False  # Return (empty_summary, is_cache_hit=False)
     
-    # Load prompt template
-    try:
-        with open(prompt_file, 'r', encoding='utf-8') as f:
-            prompt_template = f.read().strip()
-    except FileNotFoundError:
-        prompt_template = "Summarize this text in 1-2 sentences: {text}"
+    # Use the model passed in (checked once at startup)
+    if not model_to_use:
+        print("  No model available, skipping summarization")
+        return None, False  # Return (None, is_cache_hit=False)
+    
+    # Share one request between threads summarizing the same content
+    with SUMMARY_INFLIGHT_LOCK:
+        # The owner caches its result before leaving SUMMARY_INFLIGHT, so check again
+        if normalized_hash in summary_cache:
+            return summary_cache[normalized_hash], True
+        inflight = SUMMARY_INFLIGHT.get(normalized_hash)
+        if inflight is None:
+            SUMMARY_INFLIGHT[normalized_hash] = Future()
+    
+    if inflight is not None:
+        print(f"  Waiting for in-flight summary for {normalized_hash[:8]}...")
+        summary = inflight.result()
+        return summary, summary is not None
     
     # Construct the full prompt with context (like original)
     context_info = f"Application: {app_name}"
     if window_title:
         context_info += f"\nWindow Title: {window_title}"
     
-    prompt = f"{prompt_template}:\n\n{context_info}\n\nScreen Contents:\n{text_content}"
+    # The instructions go in the system prompt so every request shares the same
+    # prefix, which Ollama can reuse from its KV cache; only the screen text varies
+    prompt = f"{context_info}\n\nScreen Contents:\n{compact_screen_text(text_content)}"
     
+    summary = None
+    try:
+        summary = request_ollama_summary(prompt, model_to_use)
+        if summary is not None:
+            # Cache the result with normalized hash
+            update_summary_cache(normalized_hash, summary)
+        return summary, False  # Return (summary, is_cache_hit=False)
+    finally:
+        with SUMMARY_INFLIGHT_LOCK:
+            SUMMARY_INFLIGHT.pop(normalized_hash).set_result(summary)
+
+def get_ollama_options():
+    """Build the Ollama generation options from the configured settings."""
+    options = {
+        'num_ctx': SUMMARY_NUM_CTX,
+        'num_predict': SUMMARY_NUM_PREDICT,
+        'temperature': 0  # Deterministic output
+    }
+    if SUMMARY_NUM_BATCH:
+        options['num_batch'] = int(SUMMARY_NUM_BATCH)
+    return options
+
+OLLAMA_OPTIONS = get_ollama_options()
+
+def request_ollama_summary(prompt, model_to_use):
+    """Send one summarization request to Ollama; returns the summary or None on failure."""
     try:
-        # Use the model passed in (checked once at startup)
-        if not model_to_use:
-            print("  No model available, skipping summarization")
-            return None, False  # Return (None, is_cache_hit=False)
-        
         # Call Ollama API with optimized settings
-        response = requests.post(
-            'http://localhost:11434/api/generate',
+        response = OLLAMA_SESSION.post(
+            f'{OLLAMA_URL}/api/generate',
             json={
                 'model': model_to_use,
+                'system': PROMPT_TEMPLATE,
                 'prompt': prompt,
                 'stream': False,
-                'options': {
-                    'num_ctx': 8192 * 2,  # Use 16k context window
-                    'num_predict': 100,   # Limit output length
-                    'temperature': 0      # Deterministic output
-                }
+                'keep_alive': OLLAMA_KEEP_ALIVE,
+                'options': OLLAMA_OPTIONS
             },
             timeout=60  # Increased timeout for longer prompts
         )
         
         if response.status_code == 200:
             result = response.json()
-            summary = result.get('response', '').strip()
-            
-            # Cache the result with normalized hash
-            summary_cache[normalized_hash] = summary
-            
-            save_summary_cache(summary_cache)
-            
-            return summary, False  # Return (summary, is_cache_hit=False)
+            return result.get('response', '').strip()
         else:
             print(f"  Ollama API error: {response.status_code}")
-            return None, False  # Return (None, is_cache_hit=False)
+            return None
             
     except Exception as e:
         print(f"  Error calling Ollama: {e}")
-        return None, False  # Return (None, is_cache_hit=False)
+        return None
 
-def process_ocr(entry):
-    """Process OCR for a single entry - can run in parallel."""
-    global ocr_completed
-    
-    filename = entry['screen_capture_filename']
-    filepath = os.path.join(input_dir, filename)
+def init_ocr_worker():
+    """Initialize an OCR worker process.
+
+    Creates one persistent tesserocr API per worker so the language model is
+    loaded once and reused, instead of pytesseract spawning a tesseract process
+    (and reloading the model) for every image.
+    """
+    global worker_tess_api
     
-    # Check if the PNG file actually exists
-    if not os.path.exists(filepath):
-        print(f"  Warning: PNG file {filename} not found, skipping...")
-        return entry, False
+    if TESSEROCR_AVAILABLE:
+        worker_tess_api = tesserocr.PyTessBaseAPI(lang=OCR_LANG, psm=tesserocr.PSM.SINGLE_BLOCK, oem=OCR_OEM)
+        worker_tess_api.SetVariable('preserve_interword_spaces', '1')
+
+def preprocess_for_ocr(image):
+    """Downscale and binarize a grayscale image so tesseract has less work to do."""
+    # Most of a Retina capture is background; UI text stays legible after downscaling
+    image.thumbnail(OCR_MAX_SIZE, Image.Resampling.LANCZOS)
     
+    # Threshold at the mean brightness - tesseract's LSTM runs faster on binary input
+    threshold = ImageStat.Stat(image).mean[0]
+    return image.point(lambda p: 255 if p > threshold else 0)
+
+def process_ocr(filepath, filename):
+    """Run OCR on a single PNG - runs in a separate worker process.
+
+    Only picklable arguments are taken and no shared state is touched, so the
+    parent process is responsible for writing the .txt file and tracking progress.
+    Returns (filename, text, success).
+    """
+    # main() only submits captures that exist, so no per-file existence check here
     try:
-        # Check memory usage before processing
-        # if not check_memory_usage():
-        #     print(f"  Skipping {filename} due to high memory usage")
-        #     return entry, False
+        # Load and optimize image for OCR. Local failures (missing or unreadable
+        # files) won't fix themselves, so they are not retried
+        image = Image.open(filepath)
+        if image.mode != 'L':
+            image = image.convert('L')
+        image = preprocess_for_ocr(image)
         
-        # Load and optimize image for OCR with retry logic
-        def load_and_process_image():
-            image = Image.open(filepath)
-            if image.mode != 'L':
-                image = image.convert('L')
-            return image
-        
-        image = process_with_retry(load_and_process_image)
-        
-        # Use pytesseract with optimized settings for maximum accuracy
-        def perform_ocr():
-            return pytesseract.image_to_string(
+        # Use the worker's persistent tesseract API, or pytesseract as a fallback
+        if worker_tess_api is not None:
+            worker_tess_api.SetImage(image)
+            full_text = worker_tess_api.GetUTF8Text()
+        else:
+            full_text = pytesseract.image_to_string(
                 image, 
-                config='--psm 6 --oem 2 --dpi 600 --c preserve_interword_spaces=1'
+                lang=OCR_LANG,
+                config=f'--psm 6 --oem {OCR_OEM} --c preserve_interword_spaces=1'
             )
         
-        full_text = process_with_retry(perform_ocr)
-        
         print(f"  OCR completed for {filename}: {len(full_text)} characters extracted")
         
-        # Create text filename by replacing .png with .txt
-        text_filename = filename.replace('.png', '.txt')
-        text_filepath = os.path.join(input_dir, text_filename)
-        
-        # Save OCR text to separate .txt file
-        with open(text_filepath, 'w', encoding='utf-8') as tf:
-            tf.write(full_text.strip())
-        
-        print(f"  OCR text saved to: {text_filename}")
-        
-        # Update the entry with the text filename
-        entry['screen_text_filename'] = text_filename
-        
-        # Update progress counter
-        with progress_lock:
-            global ocr_completed
-            ocr_completed += 1
-        
-        return entry, True
+        return filename, full_text, True
         
     except Exception as e:
         print(f"  Error during OCR for {filename}: {e}")
-        return entry, False
+        return filename, None, False
+
+def read_text_file(filepath):
+    """Read a UTF-8 text file through mmap, avoiding Python's buffered reader."""
+    with open(filepath, 'rb') as f:
+        # mmap can't map an empty file
+        if os.fstat(f.fileno()).st_size == 0:
+            return ''
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            return mm[:].decode('utf-8')
+
+def save_ocr_text(entry, full_text):
+    """Save OCR text next to the PNG and record the text filename on the entry."""
+    filename = entry['screen_capture_filename']
+    
+    # Create text filename by replacing the image extension (.png or .heic) with .txt
+    text_filename = os.path.splitext(filename)[0] + '.txt'
+    text_filepath = os.path.join(input_dir, text_filename)
+    
+    # Save OCR text to separate .txt file; only trailing whitespace (tesseract's
+    # final newline/form feed) is trimmed, readers strip the text again anyway
+    Path(text_filepath).write_text(full_text.rstrip(), encoding='utf-8')
+    
+    print(f"  OCR text saved to: {text_filename}")
+    
+    # Update the entry with the text filename
+    entry['screen_text_filename'] = text_filename
+    return entry
 
 def process_summarization(entry, model_to_use=None):
-    """Process summarization for a single entry - limited concurrency."""
+    """Process summarization for a single entry (concurrency is bounded by the summary executor)."""
     global summary_completed
     
-    with SUMMARY_SEMAPHORE:  # Limit concurrent summarization requests
-        text_filename = entry['screen_text_filename']
-        text_filepath = os.path.join(input_dir, text_filename)
+    text_filename = entry['screen_text_filename']
+    text_filepath = os.path.join(input_dir, text_filename)
+    
+    try:
+        # Read the text content
+        try:
+            text_content = read_text_file(text_filepath).strip()
+        except OSError as e:
+            print(f"  Warning: Could not read text file {text_filename}: {e}")
+            return entry, False
         
-        # Check if the text file actually exists
-        if not os.path.exists(text_filepath):
-            print(f"  Warning: Text file {text_filename} not found, skipping...")
+        if not text_content:
+            print(f"  Warning: Text file {text_filename} is empty, skipping...")
             return entry, False
         
-        try:
-            # Check memory usage before processing
-            # if not check_memory_usage():
-            #     print(f"  Skipping {text_filename} due to high memory usage")
-            #     return entry, False
-            
-            # Read the text content with retry logic
-            def read_text_file():
-                with open(text_filepath, 'r', encoding='utf-8') as tf:
-                    return tf.read().strip()
-            
-            text_content = process_with_retry(read_text_file)
-            
-            if not text_content:
-                print(f"  Warning: Text file {text_filename} is empty, skipping...")
-                return entry, False
-            
-            # Check if text is too long for model context
-            if len(text_content) > 15000:  # Conservative limit for 16k context
-                print(f"  Warning: Text too long ({len(text_content)} chars), truncating for {text_filename}")
-                text_content = text_content[:15000]
-            
-            # Get summary from Ollama with retry logic
-            def get_summary():
-                return summarize_with_ollama(text_content, entry.get('app_name', ''), entry.get('window_title', ''), model_to_use)
-            
-            summary_result = process_with_retry(get_summary)
+        # Cap very long text; summary cache keys are computed from this text, and
+        # summarize_with_ollama compacts it further before building the prompt
+        if len(text_content) > 15000:
+            print(f"  Warning: Text too long ({len(text_content)} chars), truncating for {text_filename}")
+            text_content = text_content[:15000]
+        
+        # Get summary from Ollama with retry logic (only the network call is retried)
+        def get_summary():
+            return summarize_with_ollama(text_content, entry.get('app_name', ''), entry.get('window_title', ''), model_to_use)
+        
+        summary_result = process_with_retry(get_summary)
+        
+        # Unpack the result (summary, is_cache_hit)
+        if summary_result is not None:
+            summary, is_cache_hit = summary_result
             
-            # Unpack the result (summary, is_cache_hit)
-            if summary_result is not None:
-                summary, is_cache_hit = summary_result
-                
-                # Check if summary is None (API failure) vs empty string (short content)
-                if summary is not None:
-                    # Summary was successful (either has content or was skipped due to short content)
-                    if is_cache_hit:
-                        print(f"  Summary cache hit for {text_filename}")
-                    elif summary:
-                        print(f"  Summary for {text_filename}: {summary}")
-                    else:
-                        print(f"  Summary skipped for {text_filename} (content too short)")
-                    
-                    # Update the entry with the summary (empty string is valid for short content)
-                    entry['activity_summary'] = summary
-                    
-                    # Update progress counter
-                    with progress_lock:
-                        global summary_completed
-                        summary_completed += 1
-                    
-                    return entry, True
+            # Check if summary is None (API failure) vs empty string (short content)
+            if summary is not None:
+                # Summary was successful (either has content or was skipped due to short content)
+                if is_cache_hit:
+                    print(f"  Summary cache hit for {text_filename}")
+                elif summary:
+                    print(f"  Summary for {text_filename}: {summary}")
                 else:
-                    print(f"  Failed to get summary for {text_filename}")
-                    return entry, False
+                    print(f"  Summary skipped for {text_filename} (content too short)")
+                
+                # Update the entry with the summary (empty string is valid for short content)
+                entry['activity_summary'] = summary
+                
+                # Update progress counter
+                with progress_lock:
+                    global summary_completed
+                    summary_completed += 1
+                
+                return entry, True
             else:
                 print(f"  Failed to get summary for {text_filename}")
                 return entry, False
-            
-        except Exception as e:
-            print(f"  Error during summarization for {text_filename}: {e}")
+        else:
+            print(f"  Failed to get summary for {text_filename}")
             return entry, False
+        
+    except Exception as e:
+        print(f"  Error during summarization for {text_filename}: {e}")
+        return entry, False
 
 
 
 def main():
     """Main execution function."""
-    global existing_data, start_time, ocr_completed, summary_completed, input_dir, output_json
+    global existing_data, start_time, ocr_completed, summary_completed, input_dir, output_json, progress_unsaved
     
     # Parse command line arguments
     parser = argparse.ArgumentParser(description='Analyze screen captures with OCR and summarization')
@@ -446,37 +836,63 @@ def main():
     
     # Load existing JSON data
     try:
-        with open(output_json, 'r', encoding='utf-8') as f:
-            existing_data = json.load(f)
+        existing_data = load_entries(output_json)
         print(f"Loaded {len(existing_data)} existing entries from {output_json}")
     except FileNotFoundError:
         existing_data = []
         print(f"No existing data found, starting fresh")
+    # A truncated legacy .json array or a non-JSON log; starting fresh would overwrite it.
+    # orjson.JSONDecodeError, json.JSONDecodeError and UnicodeDecodeError are all ValueErrors
+    except ValueError as e:
+        print(f"Error reading {output_json}: {e}")
+        return
     
-    # Find entries that need processing
-    entries_to_process = []
+    # One directory scan gives both existence and size for every file, instead of
+    # a stat per entry in the workers
+    file_sizes = get_file_sizes(input_dir)
+
+    # Find entries that need processing in a single pass. An entry needs OCR when
+    # it has a capture but no text yet, and a summary when it has text but no summary,
+    # so the two lists never overlap. Entries whose files are missing are skipped.
+    ocr_entries = []
+    summary_entries = []
+    missing_pngs = 0
+    missing_texts = 0
     for entry in existing_data:
-        needs_ocr = 'screen_capture_filename' in entry and 'screen_text_filename' not in entry
-        needs_summary = 'screen_text_filename' in entry and 'activity_summary' not in entry
-        
-        if needs_ocr or needs_summary:
-            entries_to_process.append((entry, needs_ocr, needs_summary))
+        if 'screen_text_filename' in entry:
+            if 'activity_summary' not in entry:
+                if entry['screen_text_filename'] in file_sizes:
+                    summary_entries.append(entry)
+                else:
+                    missing_texts += 1
+        elif 'screen_capture_filename' in entry:
+            if entry['screen_capture_filename'] in file_sizes:
+                ocr_entries.append(entry)
+            else:
+                missing_pngs += 1
 
-    if not entries_to_process:
+    if missing_pngs or missing_texts:
+        print(f"⚠️  Skipping {missing_pngs} entries with missing PNGs and {missing_texts} with missing text files")
+
+    entries_count = len(ocr_entries) + len(summary_entries)
+    if not entries_count:
         print("No entries need processing.")
         return
 
-    print(f"Found {len(entries_to_process)} entries to process")
+    print(f"Found {entries_count} entries to process")
 
-    # Count operations for time estimation
-    ocr_entries = [(entry, needs_ocr, needs_summary) for entry, needs_ocr, needs_summary in entries_to_process if needs_ocr]
-    summary_entries = [(entry, needs_ocr, needs_summary) for entry, needs_ocr, needs_summary in entries_to_process if needs_summary]
+    # OCR cost grows with image size, so start the largest captures first to
+    # avoid one worker finishing a big image long after the others are idle
+    ocr_entries.sort(key=lambda entry: file_sizes[entry['screen_capture_filename']], reverse=True)
 
     print(f"  - OCR operations: {len(ocr_entries)} entries")
     print(f"  - Summarization operations: {len(summary_entries)} entries")
-    print(f"  - OCR workers: {MAX_OCR_WORKERS} (adaptive based on {multiprocessing.cpu_count()} CPU cores)")
+    # No point starting more OCR processes than there are images to process
+    ocr_workers = max(1, min(MAX_OCR_WORKERS, len(ocr_entries)))
+
+    print(f"  - OCR workers: {ocr_workers} (adaptive based on {multiprocessing.cpu_count()} CPU cores)")
     print(f"  - Summary workers: {MAX_SUMMARY_WORKERS}")
-    print(f"  - Batch size: {BATCH_SIZE}")
+    print(f"  - Ollama options: {OLLAMA_OPTIONS}")
 
     # Check system resources
     print(f"\nSystem check:")
@@ -492,159 +908,161 @@ def main():
     selected_model = None
     ollama_available = False  # Default to False
     
-    if summary_entries:
-        print(f"\nChecking Ollama availability...")
-        available_models = check_ollama_status()
-        if not available_models:
-            print("⚠️  Ollama not available - summarization will be skipped")
-            print("   To enable summarization:")
-            print("   1. Install Ollama: https://ollama.ai")
-            print("   2. Pull a model: ollama pull llama3.2:3b")
-            print("   3. Start Ollama: ollama serve")
-        else:
-            # Try to find a suitable model
-            preferred_models = ['llama3.2:3b', 'llama3.2', 'llama3', 'llama2', 'mistral']
-            for preferred in preferred_models:
-                if any(preferred in model for model in available_models):
-                    selected_model = preferred
-                    break
-            
-            if not selected_model:
-                selected_model = available_models[0]  # Use first available model
-            
-            print(f"✓ Selected Ollama model: {selected_model}")
-            ollama_available = True
+    # Every entry ends up needing a summary: OCR results are summarized as they arrive
+    print(f"\nChecking Ollama availability...")
+    available_models = check_ollama_status()
+    if not available_models:
+        print("⚠️  Ollama not available - summarization will be skipped")
+        print("   To enable summarization:")
+        print("   1. Install Ollama: https://ollama.ai")
+        print("   2. Pull a model: ollama pull llama3.2:3b")
+        print("   3. Start Ollama: ollama serve")
+    else:
+        # Try to find a suitable model
+        preferred_models = ['llama3.2:3b', 'llama3.2', 'llama3', 'llama2', 'mistral']
+        for preferred in preferred_models:
+            if any(preferred in model for model in available_models):
+                selected_model = preferred
+                break
+        
+        if not selected_model:
+            selected_model = available_models[0]  # Use first available model
+        
+        print(f"✓ Selected Ollama model: {selected_model}")
+        ollama_available = True
 
     start_time = time.time()
 
-    # Phase 1: Parallel OCR processing
+    # Check memory before starting
+    if not check_memory_usage():
+        print("  ⚠️  High memory usage, waiting before continuing...")
+        time.sleep(5)
+
+    # Progress is saved in batches, so write any unsaved completions if the run
+    # is interrupted (e.g. Ctrl+C) before the final save
+    atexit.register(flush_progress)
+
+    if ollama_available:
+        # Keep the summary cache in memory and persist it periodically and at exit
+        get_summary_cache()
+        atexit.register(flush_summary_cache)
+        stop_cache_flusher = start_summary_cache_flusher()
+
     if ocr_entries:
-        print(f"\n=== Phase 1: Parallel OCR Processing ===")
-        
-        # Process in batches to manage memory
-        for batch_start in range(0, len(ocr_entries), BATCH_SIZE):
-            batch_end = min(batch_start + BATCH_SIZE, len(ocr_entries))
-            batch = ocr_entries[batch_start:batch_end]
-            
-            print(f"\nProcessing OCR batch {batch_start//BATCH_SIZE + 1}/{(len(ocr_entries) + BATCH_SIZE - 1)//BATCH_SIZE}")
-            print(f"  Batch size: {len(batch)} entries")
-            
-            # Check memory before starting batch
-            if not check_memory_usage():
-                print("  ⚠️  High memory usage, waiting before continuing...")
-                time.sleep(5)
-            
-            with ThreadPoolExecutor(max_workers=MAX_OCR_WORKERS) as executor:
-                # Submit OCR tasks for this batch
-                future_to_entry = {}
-                for entry_tuple in batch:
-                    entry, needs_ocr, needs_summary = entry_tuple
-                    future = executor.submit(process_ocr, entry)
-                    future_to_entry[future] = entry_tuple
-                
-                # Process completed OCR tasks
-                for future in as_completed(future_to_entry):
-                    entry_tuple = future_to_entry[future]
-                    original_entry = entry_tuple[0]  # Get just the entry from the tuple
-                    
+        migrate_legacy_ocr_cache()
+    summary_total = 0
+
+    print(f"\n=== Pipelined OCR and Summarization ===")
+
+    # OCR is CPU-bound and runs in worker processes, while summarization waits on
+    # Ollama and runs in threads. Each OCR result is handed straight to the summary
+    # pool, so the two overlap instead of running as sequential phases.
+    with ProcessPoolExecutor(max_workers=ocr_workers, initializer=init_ocr_worker) as ocr_executor, \
+         ThreadPoolExecutor(max_workers=MAX_SUMMARY_WORKERS) as summary_executor:
+        ocr_futures = {}  # future -> (entry, png_hash)
+        summary_futures = {}  # future -> entry
+
+        def submit_summary(entry):
+            nonlocal summary_total
+            future = summary_executor.submit(process_summarization, entry, selected_model)
+            summary_futures[future] = entry
+            summary_total += 1
+            return future
+
+        # Entries that already have text can be summarized right away
+        if ollama_available:
+            for entry in summary_entries:
+                submit_summary(entry)
+
+        for entry in ocr_entries:
+            filename = entry['screen_capture_filename']
+            filepath = os.path.join(input_dir, filename)
+
+            # Skip tesseract for PNGs we have already OCR'd
+            png_hash = get_file_hash(filepath)
+            cached_text = load_cached_ocr_text(png_hash) if png_hash else None
+            if cached_text is not None:
+                print(f"  Using cached OCR text for {filename}")
+                save_ocr_text(entry, cached_text)
+                ocr_completed += 1
+                if ollama_available:
+                    submit_summary(entry)
+                continue
+
+            future = ocr_executor.submit(process_ocr, filepath, filename)
+            ocr_futures[future] = (entry, png_hash)
+
+        pending = set(ocr_futures) | set(summary_futures)
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+
+            for future in done:
+                if future in ocr_futures:
+                    entry, png_hash = ocr_futures.pop(future)
+
                     try:
-                        updated_entry, success = future.result()
-                        
-                        # Update the entry in the main list
-                        for i, main_entry in enumerate(existing_data):
-                            if main_entry.get('screen_capture_filename') == updated_entry.get('screen_capture_filename'):
-                                existing_data[i] = updated_entry
-                                break
-                        
+                        filename, full_text, success = future.result()
+
+                        # Workers return a result rather than mutating the entry,
+                        # so aggregate it here in the parent process
                         if success:
-                            print(f"  ✓ OCR completed for {updated_entry.get('screen_capture_filename')}")
+                            save_ocr_text(entry, full_text)
+                            ocr_completed += 1
+
+                            # Cache the OCR text under the PNG's hash
+                            if png_hash:
+                                save_cached_ocr_text(png_hash, full_text)
+
+                            print(f"  ✓ OCR completed for {filename}")
+
+                            # Hand the new text straight to summarization
+                            if ollama_available:
+                                pending.add(submit_summary(entry))
                         else:
-                            print(f"  ✗ OCR failed for {updated_entry.get('screen_capture_filename')}")
-                        
-                        # Save progress after each OCR completion (thread-safe)
-                        save_progress_safe(existing_data)
-                        
-                        # Log progress
+                            print(f"  ✗ OCR failed for {filename}")
+
                         log_progress("OCR", ocr_completed, len(ocr_entries), start_time)
-                            
+
                     except Exception as e:
-                        print(f"  ✗ OCR exception for {original_entry.get('screen_capture_filename')}: {e}")
-            
-            # Small delay between batches to allow memory cleanup
-            if batch_end < len(ocr_entries):
-                time.sleep(1)
+                        print(f"  ✗ OCR exception for {entry.get('screen_capture_filename')}: {e}")
+                else:
+                    entry = summary_futures.pop(future)
 
-    # Phase 2: Limited parallel summarization
-    if summary_entries and ollama_available:
-        print(f"\n=== Phase 2: Limited Parallel Summarization ===")
-        
-        # Process in batches to manage memory and API load
-        for batch_start in range(0, len(summary_entries), BATCH_SIZE):
-            batch_end = min(batch_start + BATCH_SIZE, len(summary_entries))
-            batch = summary_entries[batch_start:batch_end]
-            
-            print(f"\nProcessing Summary batch {batch_start//BATCH_SIZE + 1}/{(len(summary_entries) + BATCH_SIZE - 1)//BATCH_SIZE}")
-            print(f"  Batch size: {len(batch)} entries")
-            
-            # Check memory before starting batch
-            if not check_memory_usage():
-                print("  ⚠️  High memory usage, waiting before continuing...")
-                time.sleep(5)
-            
-            with ThreadPoolExecutor(max_workers=MAX_SUMMARY_WORKERS) as executor:
-                # Submit summarization tasks for this batch
-                future_to_entry = {}
-                for entry_tuple in batch:
-                    entry, needs_ocr, needs_summary = entry_tuple
-                    future = executor.submit(process_summarization, entry, selected_model)
-                    future_to_entry[future] = entry_tuple
-                
-                # Process completed summarization tasks
-                for future in as_completed(future_to_entry):
-                    entry_tuple = future_to_entry[future]
-                    original_entry = entry_tuple[0]  # Get just the entry from the tuple
-                    
                     try:
+                        # Summary workers are threads that update the shared entry dict
+                        # in place, so there is nothing to merge back into existing_data
                         updated_entry, success = future.result()
-                        
-                        # Update the entry in the main list
-                        for i, main_entry in enumerate(existing_data):
-                            if main_entry.get('screen_text_filename') == updated_entry.get('screen_text_filename'):
-                                existing_data[i] = updated_entry
-                                break
-                        
+
                         if success:
                             print(f"  ✓ Summary completed for {updated_entry.get('screen_text_filename')}")
                         else:
                             print(f"  ✗ Summary failed for {updated_entry.get('screen_text_filename')}")
-                        
-                        # Save progress after each summary completion (thread-safe)
-                        save_progress_safe(existing_data)
-                        
-                        # Log progress
-                        log_progress("Summary", summary_completed, len(summary_entries), start_time)
-                            
+
+                        log_progress("Summary", summary_completed, summary_total, start_time)
+
                     except Exception as e:
-                        print(f"  ✗ Summary exception for {original_entry.get('screen_text_filename')}: {e}")
-            
-            # Small delay between batches to allow memory cleanup and reduce API load
-            if batch_end < len(summary_entries):
-                time.sleep(2)
+                        print(f"  ✗ Summary exception for {entry.get('screen_text_filename')}: {e}")
+
+                # Save progress periodically rather than after every completion
+                save_progress_debounced(existing_data)
+
+    if ollama_available:
+        stop_cache_flusher.set()
+        flush_summary_cache()
 
     # Save final results
-    try:
-        with open(output_json, 'w', encoding='utf-8') as f:
-            json.dump(existing_data, f, indent=2, ensure_ascii=False)
+    if save_progress_safe(existing_data):
+        progress_unsaved = 0
         print(f"\n✓ Results saved to {output_json}")
-    except Exception as e:
-        print(f"\n✗ Error saving results: {e}")
+    else:
+        print(f"\n✗ Error saving results to {output_json}")
 
     total_time = time.time() - start_time
     print(f"\n=== Analysis Complete ===")
     print(f"Total time: {timedelta(seconds=int(total_time))}")
-    print(f"Average time per entry: {total_time/len(entries_to_process):.2f}s")
+    print(f"Average time per entry: {total_time/entries_count:.2f}s")
     print(f"OCR completed: {ocr_completed}/{len(ocr_entries) if ocr_entries else 0}")
-    print(f"Summaries completed: {summary_completed}/{len(summary_entries) if summary_entries else 0}")
+    print(f"Summaries completed: {summary_completed}/{summary_total}")
 
     # Final system check
     if PSUTIL_AVAILABLE:
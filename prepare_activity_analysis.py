@@ -6,17 +6,28 @@ combines them, and copies to clipboard for pasting into ChatGPT/other LLMs.
 """
 
 import os
+import io
+import csv
 import json
 import pyperclip
 from datetime import datetime
 
+# Only these fields end up in the CSV, so streamed entries keep nothing else
+CSV_FIELDS = ('timestamp', 'app_name', 'window_title', 'activity_summary')
+
+# Tabs and line breaks become spaces so each entry stays on one CSV line
+WHITESPACE_TABLE = str.maketrans({'\t': ' ', '\r': ' ', '\n': ' '})
+
+# Set ACTIVITY_LENS_VERIFY_CLIPBOARD=1 to read the clipboard back after copying
+VERIFY_CLIPBOARD = os.environ.get('ACTIVITY_LENS_VERIFY_CLIPBOARD') == '1'
+
 # Paths
 CACHE_DIR = os.path.expanduser('~/Library/Caches/activity-lens')
 
 def get_date_paths():
     """Get the current date and return paths with date appended."""
     current_date = datetime.now().strftime('%Y%m%d')
-    json_file = os.path.join(CACHE_DIR, f'screen_captures_ocr-{current_date}.json')
+    json_file = os.path.join(CACHE_DIR, f'screen_captures_ocr-{current_date}.jsonl')
     return json_file
 
 # Get current date-based paths
@@ -36,11 +47,33 @@ def load_prompt():
         print(f"❌ Error reading prompt file: {e}")
         return None
 
+def slim_entry(entry):
+    """Keep only the fields that end up in the CSV."""
+    return {key: entry[key] for key in CSV_FIELDS if key in entry}
+
+def load_legacy_activity_data(legacy_file):
+    """Load a JSON array file written by older versions of screen-capture.py, keeping only the CSV fields."""
+    with open(legacy_file, 'r', encoding='utf-8') as f:
+        return [slim_entry(entry) for entry in json.load(f)]
+
 def load_activity_data():
     """Load the screen captures activity data."""
+    legacy_file = os.path.splitext(json_file)[0] + '.json'
     try:
-        with open(json_file, 'r', encoding='utf-8') as f:
-            return json.load(f)
+        if not os.path.exists(json_file) and os.path.exists(legacy_file):
+            return load_legacy_activity_data(legacy_file)
+        # One entry per line, so entries are parsed and slimmed one at a time
+        data = []
+        with open(json_file, 'rb') as f:
+            for line_number, line in enumerate(f, 1):
+                if not line.strip():
+                    continue
+                try:
+                    data.append(slim_entry(json.loads(line)))
+                # A torn write leaves a partial line; JSONDecodeError and UnicodeDecodeError are both ValueErrors
+                except ValueError:
+                    print(f"⚠️  Skipping unreadable line {line_number} in {json_file}")
+        return data
     except FileNotFoundError:
         print(f"❌ Error: Activity data file not found: {json_file}")
         print("   Make sure you've run the screen capture analysis first")
@@ -52,69 +85,55 @@ def load_activity_data():
         print(f"❌ Error loading activity data: {e}")
         return None
 
+def clean_csv_value(value):
+    """Normalize a field so each entry stays on one CSV line."""
+    if not value:
+        return ''
+    
+    # Convert to string and normalize whitespace
+    value = str(value).strip()
+    
+    # Replace tabs and line breaks that might confuse LLMs in a single pass,
+    # folding Windows line breaks first so they become one space
+    return value.replace('\r\n', '\n').translate(WHITESPACE_TABLE)
+
 def format_activity_data_csv(data):
     """Format the activity data as CSV for LLM analysis."""
     if not data:
         return "No activity data available."
     
-    # CSV header
-    csv_lines = ['Timestamp,App Name,Window Title,Activity Summary']
+    buf = io.StringIO()
+    buf.write('Timestamp,App Name,Window Title,Activity Summary\n')
     
+    # Always quote every field for consistency and easier LLM parsing;
+    # csv.writer handles the quote escaping for commas and embedded quotes
+    writer = csv.writer(buf, quoting=csv.QUOTE_ALL, lineterminator='\n')
     for entry in data:
-        # Extract key information
-        timestamp = entry.get('timestamp', 'Unknown time')
-        app_name = entry.get('app_name', 'Unknown app')
-        window_title = entry.get('window_title', '')
-        summary = entry.get('activity_summary', '')
-        
-        # Clean and escape CSV values for LLM parsing
-        def clean_csv_value(value):
-            if not value:
-                return ''
-            
-            # Convert to string and normalize whitespace
-            value = str(value).strip()
-            
-            # Replace problematic characters that might confuse LLMs
-            value = value.replace('\t', ' ')  # Replace tabs with spaces
-            value = value.replace('\r\n', ' ')  # Replace Windows line breaks
-            value = value.replace('\r', ' ')   # Replace Mac line breaks
-            value = value.replace('\n', ' ')   # Replace Unix line breaks
-            
-            # Escape quotes (standard CSV escaping)
-            value = value.replace('"', '""')
-            
-            # Always quote the field for consistency and easier LLM parsing
-            # This prevents issues with commas, quotes, or other special characters
-            return f'"{value}"'
-        
-        # Format as CSV row
-        csv_row = [
-            clean_csv_value(timestamp),
-            clean_csv_value(app_name),
-            clean_csv_value(window_title),
-            clean_csv_value(summary)
-        ]
-        
-        csv_lines.append(','.join(csv_row))
+        writer.writerow([
+            clean_csv_value(entry.get('timestamp', 'Unknown time')),
+            clean_csv_value(entry.get('app_name', 'Unknown app')),
+            clean_csv_value(entry.get('window_title', '')),
+            clean_csv_value(entry.get('activity_summary', ''))
+        ])
     
-    return '\n'.join(csv_lines)
+    return buf.getvalue().rstrip('\n')
 
-def copy_to_clipboard(text):
-    """Copy text to clipboard and verify it worked."""
+def copy_to_clipboard(text, verify=None):
+    """Copy text to clipboard, optionally reading it back to verify it worked."""
+    if verify is None:
+        verify = VERIFY_CLIPBOARD
+    
     try:
         pyperclip.copy(text)
         
-        # Verify the copy worked by reading it back
-        clipboard_content = pyperclip.paste()
-        
-        if clipboard_content == text:
-            print("✅ Successfully copied to clipboard!")
-            return True
-        else:
+        # Reading the clipboard back costs a second pasteboard round-trip, so only do it on request
+        if verify and pyperclip.paste() != text:
             print("⚠️  Warning: Clipboard content doesn't match expected text")
             print("   The copy may have been truncated or failed")
             return False
+        
+        print("✅ Successfully copied to clipboard!")
+        return True
             
     except Exception as e:
         print(f"❌ Error copying to clipboard: {e}")
@@ -1,7 +1,7 @@
 #!/usr/bin/env python3
 """
 Reset script for screen capture analysis data.
-Removes specified fields from screen_captures_ocr.json to allow reprocessing.
+Removes specified fields from screen_captures_ocr.jsonl to allow reprocessing.
 """
 
 import os
@@ -9,6 +9,13 @@ import json
 import argparse
 from pathlib import Path
 
+# Try to import orjson (much faster JSON parsing and encoding), falling back to the json module
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
 # Paths
 CACHE_DIR = os.path.expanduser('~/Library/Caches/activity-lens')
 
@@ -16,7 +23,7 @@ def get_date_paths():
     """Get the current date and return paths with date appended."""
     from datetime import datetime
     current_date = datetime.now().strftime('%Y%m%d')
-    output_json = os.path.join(CACHE_DIR, f'screen_captures_ocr-{current_date}.json')
+    output_json = os.path.join(CACHE_DIR, f'screen_captures_ocr-{current_date}.jsonl')
     input_dir = os.path.join(CACHE_DIR, f'screen-captures-{current_date}')
     return output_json, input_dir
 
@@ -24,23 +31,50 @@ def get_date_paths():
 output_json, input_dir = get_date_paths()
 
 def load_json():
-    """Load the JSON file or create empty list if it doesn't exist."""
-    if not os.path.exists(output_json):
+    """Load the JSON Lines file or create empty list if it doesn't exist."""
+    # Captures from older versions of screen-capture.py are a single JSON array
+    legacy_json = os.path.splitext(output_json)[0] + '.json'
+    is_legacy = not os.path.exists(output_json) and os.path.exists(legacy_json)
+    if not is_legacy and not os.path.exists(output_json):
         print(f"JSON file {output_json} not found. Nothing to reset.")
         return []
     
+    # orjson.JSONDecodeError is a subclass of json.JSONDecodeError
+    parse = orjson.loads if ORJSON_AVAILABLE else json.loads
     try:
-        with open(output_json, 'r', encoding='utf-8') as f:
-            return json.load(f)
+        with open(legacy_json if is_legacy else output_json, 'rb') as f:
+            if is_legacy:
+                return parse(f.read())
+            data = []
+            for line_number, line in enumerate(f, 1):
+                if not line.strip():
+                    continue
+                try:
+                    data.append(parse(line))
+                # A torn write leaves a partial line; JSONDecodeError and UnicodeDecodeError are both ValueErrors
+                except ValueError:
+                    print(f"Warning: Skipping unreadable line {line_number} in {output_json}")
+            return data
     except (json.JSONDecodeError, FileNotFoundError, IsADirectoryError) as e:
         print(f"Error reading JSON file: {e}")
         return []
 
 def save_json(data):
-    """Save data to JSON file."""
+    """Save data to the JSON Lines file, one entry per line."""
     try:
-        with open(output_json, 'w', encoding='utf-8') as f:
-            json.dump(data, f, indent=2, ensure_ascii=False)
+        if ORJSON_AVAILABLE:
+            lines = b''.join(orjson.dumps(entry) + b'\n' for entry in data)
+        else:
+            lines = ''.join(json.dumps(entry, ensure_ascii=False) + '\n' for entry in data).encode('utf-8')
+        # Write beside the log and swap it in, so a crash never leaves it truncated
+        temp_file = output_json + '.tmp'
+        with open(temp_file, 'wb') as f:
+            f.write(lines)
+        os.replace(temp_file, output_json)
+        # The legacy entries now live in the .jsonl; keep screen-capture.py from migrating them again
+        legacy_json = os.path.splitext(output_json)[0] + '.json'
+        if os.path.exists(legacy_json):
+            os.replace(legacy_json, legacy_json + '.migrated')
         print(f"Updated JSON saved to {output_json}")
         return True
     except Exception as e:
@@ -69,25 +103,53 @@ def remove_text_filename_fields(data):
     print(f"Removed 'screen_text_filename' field from {count} entries")
     return count
 
+def get_existing_files():
+    """List input_dir once so existence checks don't stat each file."""
+    try:
+        return set(os.listdir(input_dir))
+    except OSError:
+        return set()
+
 def remove_text_files(data):
     """Remove .txt files that correspond to entries with screen_text_filename."""
     # input_dir is now defined globally with date
     count = 0
+    existing_files = get_existing_files()
     
     for entry in data:
-        if 'screen_text_filename' in entry:
+        if entry.get('screen_text_filename') in existing_files:
             text_filepath = os.path.join(input_dir, entry['screen_text_filename'])
-            if os.path.exists(text_filepath):
-                try:
-                    os.remove(text_filepath)
-                    count += 1
-                    print(f"Removed text file: {entry['screen_text_filename']}")
-                except Exception as e:
-                    print(f"Error removing {entry['screen_text_filename']}: {e}")
+            try:
+                os.remove(text_filepath)
+                count += 1
+                print(f"Removed text file: {entry['screen_text_filename']}")
+            except Exception as e:
+                print(f"Error removing {entry['screen_text_filename']}: {e}")
     
     print(f"Removed {count} text files")
     return count
 
+def get_ocr_cache_files():
+    """List the per-PNG OCR cache files shared by all dates."""
+    ocr_cache_dir = os.path.join(CACHE_DIR, 'ocr_cache')
+    if not os.path.isdir(ocr_cache_dir):
+        return []
+    return [os.path.join(ocr_cache_dir, name) for name in os.listdir(ocr_cache_dir) if name.endswith('.txt')]
+
+def remove_ocr_cache():
+    """Remove cached OCR results so the next analysis runs tesseract again."""
+    count = 0
+    
+    for cache_filepath in get_ocr_cache_files():
+        try:
+            os.remove(cache_filepath)
+            count += 1
+        except Exception as e:
+            print(f"Error removing {cache_filepath}: {e}")
+    
+    print(f"Removed {count} cached OCR results")
+    return count
+
 def main():
     parser = argparse.ArgumentParser(
         description='Reset screen capture analysis data',
@@ -99,6 +161,7 @@ Examples:
   python reset-analysis.py --text-files                 # Remove .txt files
   python reset-analysis.py --all                        # Remove all analysis data
   python reset-analysis.py --summary --text-filename    # Remove both fields
+  python reset-analysis.py --text-filename --ocr-cache  # Re-run tesseract on every capture
         """
     )
     
@@ -108,6 +171,8 @@ Examples:
                        help='Remove "screen_text_filename" field from entries')
     parser.add_argument('--text-files', action='store_true',
                        help='Remove .txt files from screen-captures directory')
+    parser.add_argument('--ocr-cache', action='store_true',
+                       help='Remove cached OCR results (shared by all dates) so OCR runs again')
     parser.add_argument('--all', action='store_true',
                        help='Remove all analysis data (summary, text_filename, and text files)')
     parser.add_argument('--dry-run', action='store_true',
@@ -118,13 +183,13 @@ Examples:
     args = parser.parse_args()
     
     # If no arguments provided, show help
-    if not any([args.summary, args.text_filename, args.text_files, args.all]):
+    if not any([args.summary, args.text_filename, args.text_files, args.ocr_cache, args.all]):
         parser.print_help()
         return
     
     # Load the JSON data
     data = load_json()
-    if not data:
+    if not data and not args.ocr_cache:
         return
     
     print(f"Loaded {len(data)} entries from {output_json}")
@@ -133,6 +198,7 @@ Examples:
     summary_count = 0
     text_filename_count = 0
     text_files_count = 0
+    ocr_cache_count = 0
     
     if args.all or args.summary:
         summary_count = sum(1 for entry in data if 'activity_summary' in entry)
@@ -141,9 +207,11 @@ Examples:
         text_filename_count = sum(1 for entry in data if 'screen_text_filename' in entry and 'screen_capture_filename' in entry)
     
     if args.all or args.text_files:
-        input_dir = os.path.join(CACHE_DIR, 'screen-captures')
-        text_files_count = sum(1 for entry in data if 'screen_text_filename' in entry and 
-                              os.path.exists(os.path.join(input_dir, entry['screen_text_filename'])))
+        existing_files = get_existing_files()
+        text_files_count = sum(1 for entry in data if entry.get('screen_text_filename') in existing_files)
+    
+    if args.ocr_cache:
+        ocr_cache_count = len(get_ocr_cache_files())
     
     # Show what would be removed
     print(f"\nWould remove:")
@@ -153,8 +221,10 @@ Examples:
         print(f"  - {text_filename_count} screen_text_filename fields")
     if text_files_count > 0:
         print(f"  - {text_files_count} text files")
+    if ocr_cache_count > 0:
+        print(f"  - {ocr_cache_count} cached OCR results")
     
-    if summary_count == 0 and text_filename_count == 0 and text_files_count == 0:
+    if summary_count == 0 and text_filename_count == 0 and text_files_count == 0 and ocr_cache_count == 0:
         print("  Nothing to remove!")
         return
     
@@ -181,8 +251,11 @@ Examples:
     if args.all or args.text_files:
         remove_text_files(data)
     
-    # Save the updated JSON
-    if args.all or args.summary or args.text_filename:
+    if args.ocr_cache:
+        remove_ocr_cache()
+    
+    # Rewrite the log only if fields were actually removed from it
+    if summary_count or text_filename_count:
         if save_json(data):
             print("Reset completed successfully!")
         else:
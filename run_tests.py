@@ -6,9 +6,36 @@ Directly imports and runs all tests without complex module copying.
 
 import sys
 import os
+import io
 import time
+import argparse
 import unittest
 import importlib.util
+from concurrent.futures import ProcessPoolExecutor
+
+# Define test modules and their corresponding main modules
+TEST_CONFIGS = [
+    {
+        'test_module': 'test_prepare_activity_analysis',
+        'main_module': 'prepare_activity_analysis',
+        'main_file': 'prepare_activity_analysis.py'
+    },
+    {
+        'test_module': 'test_screen_capture', 
+        'main_module': 'screen_capture',
+        'main_file': 'screen-capture.py'
+    },
+    {
+        'test_module': 'test_analyze_screen_captures',
+        'main_module': 'analyze_screen_captures', 
+        'main_file': 'analyze-screen-captures.py'
+    },
+    {
+        'test_module': 'test_reset_analysis',
+        'main_module': 'reset_analysis',
+        'main_file': 'reset-analysis.py'
+    }
+]
 
 def load_module_from_file(module_name, file_path):
     """Load a Python module from a file path, even with hyphens in the name."""
@@ -17,7 +44,60 @@ def load_module_from_file(module_name, file_path):
     spec.loader.exec_module(module)
     return module
 
-def run_tests():
+def load_test_module(config, script_dir):
+    """Load a config's main module into sys.modules and return its test module's tests."""
+    main_module_name = config['main_module']
+    main_file_path = os.path.join(script_dir, config['main_file']) if config['main_file'] else None
+    
+    # Load the main module (with hyphenated filename) into sys.modules
+    if main_file_path and os.path.exists(main_file_path):
+        main_module = load_module_from_file(main_module_name, main_file_path)
+        sys.modules[main_module_name] = main_module
+    
+    # Import and load the test module
+    test_module = __import__(config['test_module'])
+    return unittest.TestLoader().loadTestsFromModule(test_module)
+
+def run_test_module(config, script_dir):
+    """Run one test module in a worker process and return a picklable summary."""
+    sys.path.insert(0, script_dir)
+    stream = io.StringIO()
+    try:
+        tests = load_test_module(config, script_dir)
+    except Exception as e:
+        return {'test_module': config['test_module'], 'output': f"✗ Failed to load {config['test_module']}: {e}\n",
+                'tests_run': 0, 'failures': [], 'errors': []}
+    
+    result = unittest.TextTestRunner(stream=stream, verbosity=2).run(tests)
+    return {
+        'test_module': config['test_module'],
+        'output': stream.getvalue(),
+        'tests_run': result.testsRun,
+        'failures': [(str(test), traceback) for test, traceback in result.failures],
+        'errors': [(str(test), traceback) for test, traceback in result.errors],
+    }
+
+def run_tests_parallel(script_dir):
+    """Run each test module in its own process; returns (tests_run, failures, errors)."""
+    print(f"\n🏃 Running {len(TEST_CONFIGS)} test modules in parallel...")
+    tests_run = 0
+    failures = []
+    errors = []
+    
+    with ProcessPoolExecutor(max_workers=len(TEST_CONFIGS)) as executor:
+        futures = [executor.submit(run_test_module, config, script_dir) for config in TEST_CONFIGS]
+        # Print each module's buffered output in order so logs don't interleave
+        for future in futures:
+            summary = future.result()
+            print(f"\n--- {summary['test_module']} ---")
+            print(summary['output'], end='')
+            tests_run += summary['tests_run']
+            failures.extend(summary['failures'])
+            errors.extend(summary['errors'])
+    
+    return tests_run, failures, errors
+
+def run_tests(parallel=False):
     """Run all test suites and return results."""
     print("🧪 Running Activity Lens Tests (Simplified)")
     print("=" * 50)
@@ -28,89 +108,63 @@ def run_tests():
     # Add current directory to path for imports
     sys.path.insert(0, script_dir)
     
-    # Define test modules and their corresponding main modules
-    test_configs = [
-        {
-            'test_module': 'test_prepare_activity_analysis',
-            'main_module': 'prepare_activity_analysis',
-            'main_file': 'prepare_activity_analysis.py'
-        },
-        {
-            'test_module': 'test_screen_capture', 
-            'main_module': 'screen_capture',
-            'main_file': 'screen-capture.py'
-        },
-        {
-            'test_module': 'test_analyze_screen_captures',
-            'main_module': 'analyze_screen_captures', 
-            'main_file': 'analyze-screen-captures.py'
-        },
-        {
-            'test_module': 'test_reset_analysis',
-            'main_module': 'reset_analysis',
-            'main_file': 'reset-analysis.py'
-        }
-    ]
-    
-    # Load and run tests
-    loader = unittest.TestLoader()
-    suite = unittest.TestSuite()
-    
-    for config in test_configs:
-        test_module_name = config['test_module']
-        main_module_name = config['main_module']
-        main_file_path = os.path.join(script_dir, config['main_file']) if config['main_file'] else None
-        
-        try:
-            # Load the main module (with hyphenated filename) into sys.modules
-            if main_file_path and os.path.exists(main_file_path):
-                main_module = load_module_from_file(main_module_name, main_file_path)
-                sys.modules[main_module_name] = main_module
-            
-            # Import and load the test module
-            test_module = __import__(test_module_name)
-            tests = loader.loadTestsFromModule(test_module)
-            suite.addTests(tests)
-            print(f"✓ Loaded tests from {test_module_name}")
-            
-        except Exception as e:
-            print(f"✗ Failed to load {test_module_name}: {e}")
-    
-    # Run tests
-    print(f"\n🏃 Running {suite.countTestCases()} tests...")
-    runner = unittest.TextTestRunner(verbosity=2)
     start_time = time.time()
-    result = runner.run(suite)
+    if parallel:
+        tests_run, failures, errors = run_tests_parallel(script_dir)
+    else:
+        # Load and run tests
+        suite = unittest.TestSuite()
+        
+        for config in TEST_CONFIGS:
+            test_module_name = config['test_module']
+            try:
+                suite.addTests(load_test_module(config, script_dir))
+                print(f"✓ Loaded tests from {test_module_name}")
+                
+            except Exception as e:
+                print(f"✗ Failed to load {test_module_name}: {e}")
+        
+        # Run tests
+        print(f"\n🏃 Running {suite.countTestCases()} tests...")
+        runner = unittest.TextTestRunner(verbosity=2)
+        result = runner.run(suite)
+        tests_run = result.testsRun
+        failures = [(str(test), traceback) for test, traceback in result.failures]
+        errors = [(str(test), traceback) for test, traceback in result.errors]
     end_time = time.time()
     
     # Print summary
     print("\n" + "=" * 50)
     print("📊 TEST SUMMARY")
     print("=" * 50)
-    print(f"Tests run: {result.testsRun}")
-    print(f"Failures: {len(result.failures)}")
-    print(f"Errors: {len(result.errors)}")
+    print(f"Tests run: {tests_run}")
+    print(f"Failures: {len(failures)}")
+    print(f"Errors: {len(errors)}")
     print(f"Time: {end_time - start_time:.2f} seconds")
     
-    if result.failures:
+    if failures:
         print("\n❌ FAILURES:")
-        for test, traceback in result.failures:
+        for test, traceback in failures:
             print(f"  - {test}: {traceback.split('AssertionError:')[-1].strip()}")
     
-    if result.errors:
+    if errors:
         print("\n💥 ERRORS:")
-        for test, traceback in result.errors:
+        for test, traceback in errors:
             print(f"  - {test}: {traceback.split('Exception:')[-1].strip()}")
     
     # Return success/failure
-    success = len(result.failures) == 0 and len(result.errors) == 0
+    success = len(failures) == 0 and len(errors) == 0
     if success:
         print("\n✅ All tests passed!")
     else:
-        print(f"\n❌ {len(result.failures) + len(result.errors)} test(s) failed!")
+        print(f"\n❌ {len(failures) + len(errors)} test(s) failed!")
     
     return success
 
 if __name__ == '__main__':
-    success = run_tests()
+    parser = argparse.ArgumentParser(description='Run the Activity Lens test suites')
+    parser.add_argument('--parallel', action='store_true',
+                        help='Run each test module in its own process')
+    args = parser.parse_args()
+    success = run_tests(parallel=args.parallel)
     sys.exit(0 if success else 1) 
\ No newline at end of file
@@ -1,53 +1,237 @@
 from datetime import datetime
 import time
 import os
-import Quartz.CoreGraphics as CG
 import subprocess
 import json
-from PIL import Image
+import re
+import atexit
+import threading
+import struct
+import hashlib
+import functools
 import argparse
+import contextlib
+
+# Run AppleScript in-process through NSAppleScript when PyObjC's Foundation bridge
+# is available (pyobjc-framework-Quartz pulls it in), instead of paying an
+# osascript process spawn and script compile for every query
+try:
+    from Foundation import NSAppleScript
+    NSAPPLESCRIPT_AVAILABLE = True
+except ImportError:
+    NSAPPLESCRIPT_AVAILABLE = False
+
+# Listen for app switches with NSWorkspace notifications (pyobjc-framework-Cocoa,
+# a dependency of pyobjc-framework-Quartz) so a switch is captured right away
+# instead of at the next interval tick
+try:
+    from AppKit import NSWorkspace, NSWorkspaceDidActivateApplicationNotification
+    from Foundation import NSDate, NSDefaultRunLoopMode, NSOperationQueue, NSRunLoop, NSTimer
+    APPKIT_AVAILABLE = True
+except ImportError:
+    APPKIT_AVAILABLE = False
+
+# PyObjC (a dependency of pyobjc-framework-Quartz) hands Cocoa objects to the
+# autorelease pool; the capture loop drains one per tick so they don't pile up
+try:
+    import objc
+    OBJC_AVAILABLE = True
+except ImportError:
+    OBJC_AVAILABLE = False
+
+def autorelease_pool():
+    """Return a context that releases Cocoa objects autoreleased inside it (a no-op without PyObjC)."""
+    return objc.autorelease_pool() if OBJC_AVAILABLE else contextlib.nullcontext()
+
+# Quartz is imported on first use: loading the framework bridge is slow, and
+# text-only captures and the test suite's imports never need it
+CG = None
+
+def load_core_graphics():
+    """Import Quartz.CoreGraphics on first use and return it."""
+    global CG
+    if CG is None:
+        import Quartz.CoreGraphics as CG
+    return CG
+
+# Try to import orjson (much faster JSON encoding), falling back to the json module
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+# Set ACTIVITY_LENS_DEBUG=1 for per-capture geometry and command logging
+DEBUG = os.environ.get('ACTIVITY_LENS_DEBUG') == '1'
 
 # -----------------------------------------------------------------------------
 # Paths
 # -----------------------------------------------------------------------------
 CACHE_DIR = os.path.expanduser('~/Library/Caches/activity-lens')
 
-def get_date_paths():
-    """Get the current date and return paths with date appended."""
-    current_date = datetime.now().strftime('%Y%m%d')
+def get_date_paths(current_date=None):
+    """Get the current (or given YYYYMMDD) date and return paths with date appended."""
+    if current_date is None:
+        current_date = datetime.now().strftime('%Y%m%d')
     screen_dir = os.path.join(CACHE_DIR, f'screen-captures-{current_date}')
-    json_path = os.path.join(CACHE_DIR, f'screen_captures_ocr-{current_date}.json')
+    json_path = os.path.join(CACHE_DIR, f'screen_captures_ocr-{current_date}.jsonl')
     return screen_dir, json_path
 
 # Get current date-based paths
-SCREEN_DIR, JSON_PATH = get_date_paths()
+CURRENT_DATE = datetime.now().strftime('%Y%m%d')
+SCREEN_DIR, JSON_PATH = get_date_paths(CURRENT_DATE)
 os.makedirs(SCREEN_DIR, exist_ok=True)
 
+def refresh_date_paths(now):
+    """Move SCREEN_DIR and JSON_PATH to the new day's files once the date changes."""
+    global CURRENT_DATE, SCREEN_DIR, JSON_PATH
+    current_date = now.strftime('%Y%m%d')
+    if current_date != CURRENT_DATE:
+        CURRENT_DATE = current_date
+        SCREEN_DIR, JSON_PATH = get_date_paths(current_date)
+        os.makedirs(SCREEN_DIR, exist_ok=True)
+        # Each day's log should hold its own copy of any unchanged text
+        last_text_digests.clear()
+
 # -----------------------------------------------------------------------------
-# Helper to append a metadata block to the master JSON file
+# Helpers for the master metadata log (JSON Lines: one entry per line)
 # -----------------------------------------------------------------------------
 
 
-def append_metadata(entry: dict):
+# The log stays open between captures instead of being reopened every tick
+metadata_file = None
+metadata_file_path = None
+metadata_lock = threading.Lock()
+
+
+def migrate_legacy_log(path):
+    """Fold a day's old JSON-array log into its JSON Lines log once, then set it aside.
+
+    Readers only fall back to the .json file when no .jsonl exists, so entries
+    captured before an upgrade would otherwise disappear once capture resumes.
+    """
+    legacy_path = os.path.splitext(path)[0] + '.json'
+    if not os.path.exists(legacy_path):
+        return
+    
+    # A .jsonl beside the legacy log was written by analyze-screen-captures.py or
+    # reset-analysis.py from the legacy entries, so it already holds them all
+    if os.path.exists(path):
+        os.replace(legacy_path, legacy_path + '.migrated')
+        print(f"Set aside {legacy_path}; its entries are already in {path}")
+        return
+    
     try:
-        with open(JSON_PATH, 'r', encoding='utf-8') as jf:
-            data = json.load(jf)
-    except (FileNotFoundError, json.JSONDecodeError):
-        data = []                          # start fresh if file missing or invalid
+        with open(legacy_path, 'rb') as f:
+            legacy_entries = orjson.loads(f.read()) if ORJSON_AVAILABLE else json.loads(f.read())
+    # orjson.JSONDecodeError is a subclass of json.JSONDecodeError
+    except (OSError, json.JSONDecodeError) as e:
+        print(f"Warning: Could not migrate {legacy_path}: {e}")
+        return
+    
+    temp_path = path + '.tmp'
+    with open(temp_path, 'wb') as f:
+        f.write(b''.join(encode_entry(entry) for entry in legacy_entries))
+    os.replace(temp_path, path)
+    os.replace(legacy_path, legacy_path + '.migrated')
+    print(f"Migrated {len(legacy_entries)} entries from {legacy_path} to {path}")
+
+
+def get_metadata_file():
+    """Return the open log handle, reopening it if JSON_PATH changed or the file was replaced."""
+    global metadata_file, metadata_file_path
+    if metadata_file is not None:
+        # analyze-screen-captures.py rewrites the log via os.replace; appends to
+        # the old inode would be lost, so follow the path to the new file
+        try:
+            replaced = os.stat(JSON_PATH).st_ino != os.fstat(metadata_file.fileno()).st_ino
+        except FileNotFoundError:
+            replaced = True
+        if replaced or metadata_file_path != JSON_PATH:
+            metadata_file.close()
+            metadata_file = None
+    if metadata_file is None:
+        migrate_legacy_log(JSON_PATH)
+        metadata_file = open(JSON_PATH, 'ab', buffering=64 * 1024)
+        metadata_file_path = JSON_PATH
+        # A crash mid-append can leave a partial last line; end it so the
+        # next entry starts on a line of its own
+        if metadata_file.tell() > 0:
+            with open(JSON_PATH, 'rb') as f:
+                f.seek(-1, os.SEEK_END)
+                if f.read(1) != b"\n":
+                    metadata_file.write(b"\n")
+    return metadata_file
+
+
+def close_metadata_file():
+    """Flush and close the log handle, if open."""
+    global metadata_file
+    with metadata_lock:
+        if metadata_file is not None:
+            metadata_file.close()
+            metadata_file = None
+
+
+atexit.register(close_metadata_file)
+
+
+def encode_entry(entry):
+    """Serialize one log entry to a UTF-8 JSON line, using orjson when available."""
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(entry, option=orjson.OPT_APPEND_NEWLINE)
+    return json.dumps(entry, ensure_ascii=False).encode('utf-8') + b"\n"
+
 
-    data.append(entry)
-    with open(JSON_PATH, 'w', encoding='utf-8') as jf:
-        json.dump(data, jf, indent=2, ensure_ascii=False)
+def append_metadata(entry: dict):
+    """Append one entry to the log without reading or rewriting earlier entries."""
+    line = encode_entry(entry)
+    with metadata_lock:
+        jf = get_metadata_file()
+        jf.write(line)
+        # Flush every entry so readers never see a partial line
+        jf.flush()
+
+def read_all_entries(path=None):
+    """Yield the entries of a metadata log one at a time."""
+    path = path or JSON_PATH
+    with open(path, 'rb') as jf:
+        for line_number, line in enumerate(jf, 1):
+            if not line.strip():
+                continue
+            try:
+                yield json.loads(line)
+            # A torn write leaves a partial line; JSONDecodeError and UnicodeDecodeError are both ValueErrors
+            except ValueError:
+                print(f"Warning: Skipping unreadable line {line_number} in {path}")
 
 # List of supported browsers (these will try text extraction first)
 browser_apps = ['Arc', 'Google Chrome', 'Safari', 'Brave Browser', 'Microsoft Edge']
 
+# AppleScript that extracts the title and page text for each supported browser
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+browser_script_paths = {
+    'Arc': os.path.join(SCRIPT_DIR, 'arc_script.scpt'),
+    'Google Chrome': os.path.join(SCRIPT_DIR, 'chrome_script.scpt'),
+    'Safari': os.path.join(SCRIPT_DIR, 'safari_script.scpt'),
+    'Brave Browser': os.path.join(SCRIPT_DIR, 'brave_script.scpt'),
+    'Microsoft Edge': os.path.join(SCRIPT_DIR, 'edge_script.scpt'),
+}
+
 # List of apps where text extraction is likely to work well
 text_extraction_apps = ['Visual Studio Code', 'Sublime Text', 'Atom', 'TextEdit', 'Notes', 'Mail', 'Calendar', 'Reminders', 'Terminal', 'iTerm2']
 
 # List of apps that should only record metadata (no PNG capture, no text extraction)
 metadata_only_apps = ['FaceTime', 'Teams', 'Discord']
 
+# Capture path for each configured app, built once so each capture does a dict
+# lookup instead of scanning the lists above in turn
+APP_CATEGORIES = {
+    **{name: 'browser' for name in browser_apps},
+    **{name: 'text' for name in text_extraction_apps},
+    **{name: 'metadata_only' for name in metadata_only_apps},
+}
+
 # App-specific cropping configurations (left%, top%, right%, bottom% crop)
 # These are applied after the initial window capture
 app_cropping = {
@@ -58,42 +242,107 @@ app_cropping = {
 }
 
 
+class SanitizeTable(dict):
+    """str.translate table mapping non-alphanumeric characters to '_'.
+
+    ASCII is precomputed; other characters are classified on first use and cached.
+    """
+
+    def __missing__(self, codepoint):
+        value = codepoint if chr(codepoint).isalnum() else '_'
+        self[codepoint] = value
+        return value
+
+
+# Non-alphanumeric ASCII maps to '_'; alphanumerics map to themselves
+SANITIZE_TABLE = SanitizeTable(
+    (i, i if chr(i).isalnum() else '_') for i in range(0x80)
+)
+
+
+@functools.lru_cache(maxsize=64)
+def sanitize_app_name(raw_name):
+    """Return raw_name with non-alphanumerics replaced by '_', memoized per app."""
+    return raw_name.translate(SANITIZE_TABLE)
+
+
+
+# -----------------------------------------------------------------------------
+# AppleScript runner
+# -----------------------------------------------------------------------------
+
+# Compiled NSAppleScript objects keyed by source, so each script compiles once per session
+compiled_scripts = {}
+# Source text of the *_script.scpt files (plain AppleScript), read once per session
+script_sources = {}
+
+
+def run_osascript(args):
+    """Run osascript with the given arguments and return its stripped output.
+
+    Output is decoded by subprocess itself; raises CalledProcessError on a
+    non-zero exit and TimeoutExpired if the script hangs.
+    """
+    result = subprocess.run(['osascript', *args], capture_output=True, text=True,
+                            encoding='utf-8', errors='ignore', timeout=10, check=True)
+    return result.stdout.strip()
+
+
+def run_applescript(source):
+    """Run AppleScript source and return its result as a stripped string.
+
+    NSAppleScript is not thread-safe, so call this from the capture loop's thread.
+    Raises RuntimeError (in-process) or SubprocessError (osascript) on failure.
+    """
+    if not NSAPPLESCRIPT_AVAILABLE:
+        return run_osascript(['-e', source])
+
+    script = compiled_scripts.get(source)
+    if script is None:
+        script = NSAppleScript.alloc().initWithSource_(source)
+        compiled, error = script.compileAndReturnError_(None)
+        if not compiled:
+            raise RuntimeError(f"AppleScript compile error: {error}")
+        compiled_scripts[source] = script
+
+    result, error = script.executeAndReturnError_(None)
+    if result is None:
+        raise RuntimeError(f"AppleScript error: {error}")
+    return (result.stringValue() or '').strip()
+
+
+def run_applescript_file(script_path):
+    """Run one of the bundled AppleScript files and return its result."""
+    if not NSAPPLESCRIPT_AVAILABLE:
+        return run_osascript([script_path])
+
+    source = script_sources.get(script_path)
+    if source is None:
+        with open(script_path, 'r', encoding='utf-8') as f:
+            source = script_sources[script_path] = f.read()
+    return run_applescript(source)
+
 
 # -----------------------------------------------------------------------------
 # AppleScript-based visible text extraction (works without Accessibility bridge)
 # -----------------------------------------------------------------------------
 
 
-def grab_browser_content():
+def grab_browser_content(app_name):
     """Return (title, text) from the front-most browser window.
     
-    • If the frontmost app is a browser, extracts both title and text content.
+    • app_name is the frontmost app's raw name from get_active_app_info, so
+      the frontmost app isn't queried a second time.
+    • If it is a supported browser, extracts both title and text content.
     • Otherwise returns empty strings.
     """
     try:
-        # Get the frontmost app name
-        app_name = subprocess.check_output([
-            'osascript', '-e', 'tell application "System Events" to get name of first application process whose frontmost is true'
-        ]).decode().strip()
-        
-        script_path = None
-        
-        # Map app names to script files
-        if app_name == "Arc":
-            script_path = os.path.join(os.path.dirname(__file__), 'arc_script.scpt')
-        elif app_name == "Google Chrome":
-            script_path = os.path.join(os.path.dirname(__file__), 'chrome_script.scpt')
-        elif app_name == "Safari":
-            script_path = os.path.join(os.path.dirname(__file__), 'safari_script.scpt')
-        elif app_name == "Brave Browser":
-            script_path = os.path.join(os.path.dirname(__file__), 'brave_script.scpt')
-        elif app_name == "Microsoft Edge":
-            script_path = os.path.join(os.path.dirname(__file__), 'edge_script.scpt')
-        else:
+        script_path = browser_script_paths.get(app_name)
+        if not script_path:
             return "", ""  # Not a supported browser
         
         # Execute the appropriate script
-        raw = subprocess.check_output(['osascript', script_path]).decode('utf-8', errors='ignore').strip()
+        raw = run_applescript_file(script_path)
         
         # Split the result on the separator
         if "|||" in raw:
@@ -106,54 +355,81 @@ def grab_browser_content():
         print(f"Browser content extraction failed: {e}")
         return "", ""
 
-def grab_generic_text():
-    """Fallback function to get text from non-browser applications."""
-    try:
-        static_text_script = (
-            'tell application "System Events" to tell (first application process whose frontmost is true) '
-            'to get value of every static text of windows'
-        )
-        raw = subprocess.check_output(['osascript', '-e', static_text_script]).decode('utf-8', errors='ignore')
-        return raw.replace(', ', '\n').replace(', ', '\n').replace('\n', '\n').replace('\\n', '\n').strip()
-    except subprocess.CalledProcessError as e:
-        print(f"Error in grab_generic_text: {e}")
-        return ""
-
-
-
-
+# Static text values are joined with ', ' and may contain escaped newlines as a
+# literal backslash-n; both become real line breaks in a single pass
+TEXT_SEPARATOR_RE = re.compile(r', |\\n')
+
+# One System Events query for the frontmost app's name and window title, plus
+# the window's static text for apps in text_extraction_apps, so those apps
+# don't need a second AppleScript round trip. The text is coerced to a string
+# inside the script because NSAppleScript can't return a nested list as text.
+APP_INFO_SCRIPT = '''
+tell application "System Events"
+    set frontApp to first application process whose frontmost is true
+    set appName to name of frontApp
+    try
+        set windowTitle to name of front window of frontApp
+    on error
+        set windowTitle to ""
+    end try
+    set staticText to ""
+    if appName is in {%s} then
+        try
+            set AppleScript's text item delimiters to ", "
+            set staticText to (value of every static text of windows of frontApp) as text
+        end try
+    end if
+end tell
+return appName & "|||" & windowTitle & "|||" & staticText
+''' % ', '.join(json.dumps(app) for app in text_extraction_apps)
+
+
+# Active display rects as (x0, y0, x1, y1), main display first, refreshed every
+# DISPLAY_CACHE_SECONDS so display changes are picked up without querying
+# CoreGraphics per capture
+DISPLAY_CACHE_SECONDS = 30
+MAX_DISPLAYS = 16
+display_rects = None
+display_rects_checked = 0.0
+
+def get_display_rects():
+    """Return the cached active display rects, refreshing them when stale."""
+    global display_rects, display_rects_checked
+    now = time.monotonic()
+    if display_rects is None or now - display_rects_checked > DISPLAY_CACHE_SECONDS:
+        load_core_graphics()
+        err, display_ids, count = CG.CGGetActiveDisplayList(MAX_DISPLAYS, None, None)
+        if err or not count:
+            display_ids, count = [CG.CGMainDisplayID()], 1
+        rects = []
+        for display_id in display_ids[:count]:
+            display_bounds = CG.CGDisplayBounds(display_id)
+            x, y = int(display_bounds.origin.x), int(display_bounds.origin.y)
+            rects.append((x, y, x + int(display_bounds.size.width), y + int(display_bounds.size.height)))
+        display_rects = rects
+        display_rects_checked = now
+    return display_rects
 
 def get_display_id_for_window(bounds):
-    """Determine which display contains the window and return its ID."""
+    """Return the 1-based screencapture display number containing the window's center."""
     window_center_x = bounds['X'] + bounds['Width'] // 2
     window_center_y = bounds['Y'] + bounds['Height'] // 2
     
-    # print(f"  Window center: ({window_center_x}, {window_center_y})")
-    
-    # Get main display bounds
-    main_display = CG.CGMainDisplayID()
-    main_bounds = CG.CGDisplayBounds(main_display)
-    main_x, main_y = int(main_bounds.origin.x), int(main_bounds.origin.y)
-    main_width, main_height = int(main_bounds.size.width), int(main_bounds.size.height)
+    # CGGetActiveDisplayList lists the main display first, matching screencapture -D 1
+    for display_number, (x0, y0, x1, y1) in enumerate(get_display_rects(), 1):
+        if x0 <= window_center_x <= x1 and y0 <= window_center_y <= y1:
+            return display_number
     
-    # print(f"  Main display bounds: {main_x}, {main_y}, {main_width}x{main_height}")
-    
-    # Check if window is on main display
-    if (main_x <= window_center_x <= main_x + main_width and 
-        main_y <= window_center_y <= main_y + main_height):
-        # print(f"  Window is on main display (ID: 1)")
-        return 1
-    
-    # Window is on secondary display
-    # print(f"  Window is on secondary display (ID: 2)")
-    return 2
+    # Center is off every display (e.g. a window dragged partly off-screen)
+    return 1
 
 def calculate_cropped_bounds(original_bounds, app_name):
     """Calculate the cropped bounds based on app-specific cropping percentages."""
-    if app_name not in app_cropping:
+    crop = app_cropping.get(app_name)
+    if not crop or crop == (0, 0, 0, 0):
         return original_bounds
     
-    left_crop_pct, top_crop_pct, right_crop_pct, bottom_crop_pct = app_cropping[app_name]
+    left_crop_pct, top_crop_pct, right_crop_pct, bottom_crop_pct = crop
     
     # Calculate crop pixels based on percentages
     left_crop_pixels = int(original_bounds['Width'] * left_crop_pct / 100)
@@ -172,27 +448,134 @@ def calculate_cropped_bounds(original_bounds, app_name):
         print(f"  ⚠️  Cropping would result in invalid dimensions, using original bounds")
         return original_bounds
     
-    cropped_bounds = {
-        'X': new_x,
-        'Y': new_y,
-        'Width': new_width,
-        'Height': new_height
-    }
+    # Keep any other keys (e.g. WindowID) from the original bounds
+    cropped_bounds = dict(original_bounds, X=new_x, Y=new_y, Width=new_width, Height=new_height)
     
-    print(f"  Original bounds: {original_bounds['X']}, {original_bounds['Y']}, {original_bounds['Width']}x{original_bounds['Height']}")
-    print(f"  Cropping: left={left_crop_pct}%, top={top_crop_pct}%, right={right_crop_pct}%, bottom={bottom_crop_pct}%")
-    print(f"  Cropped bounds: {cropped_bounds['X']}, {cropped_bounds['Y']}, {cropped_bounds['Width']}x{cropped_bounds['Height']}")
+    if DEBUG:
+        print(f"  Original bounds: {original_bounds['X']}, {original_bounds['Y']}, {original_bounds['Width']}x{original_bounds['Height']}")
+        print(f"  Cropping: left={left_crop_pct}%, top={top_crop_pct}%, right={right_crop_pct}%, bottom={bottom_crop_pct}%")
+        print(f"  Cropped bounds: {cropped_bounds['X']}, {cropped_bounds['Y']}, {cropped_bounds['Width']}x{cropped_bounds['Height']}")
     
     return cropped_bounds
 
+PNG_SIGNATURE = b'\x89PNG\r\n\x1a\n'
+
+def read_png_size(path):
+    """Return (width, height) from a PNG's IHDR chunk without decoding the image."""
+    with open(path, 'rb') as f:
+        header = f.read(24)
+    if len(header) < 24 or header[:8] != PNG_SIGNATURE:
+        raise ValueError("not a PNG file")
+    return struct.unpack('>II', header[16:24])
+
+# Screenshot encoding: PNG by default; HEIC (ACTIVITY_LENS_IMAGE_FORMAT=heic) is
+# lossy but several times smaller and hardware-encoded on Apple Silicon.
+# analyze-screen-captures.py needs pillow-heif installed to OCR HEIC captures.
+IMAGE_TYPES = {'png': 'public.png', 'heic': 'public.heic'}
+IMAGE_FORMAT = os.environ.get('ACTIVITY_LENS_IMAGE_FORMAT', 'png').lower()
+if IMAGE_FORMAT not in IMAGE_TYPES:
+    print(f"Warning: unsupported ACTIVITY_LENS_IMAGE_FORMAT '{IMAGE_FORMAT}', using png")
+    IMAGE_FORMAT = 'png'
+# High enough that small UI text stays sharp for OCR
+HEIC_QUALITY = 0.8
+
+def describe_image(path):
+    """Return the image's dimensions for logging, or its format when it isn't a PNG."""
+    if IMAGE_FORMAT == 'png':
+        return read_png_size(path)
+    return IMAGE_FORMAT.upper()
+
+# Capture in-process with CoreGraphics until the API turns out to be missing;
+# CGWindowListCreateImage is deprecated and may be absent on newer macOS
+CG_CAPTURE_AVAILABLE = True
+
+def convert_to_grayscale(image):
+    """Redraw a CGImage into an 8-bit grayscale bitmap without alpha.
+
+    OCR converts captures to grayscale anyway, and a one-channel PNG is
+    roughly a quarter of the bytes of the 32-bit RGBA capture.
+    """
+    width, height = CG.CGImageGetWidth(image), CG.CGImageGetHeight(image)
+    context = CG.CGBitmapContextCreate(None, width, height, 8, 0,
+                                       CG.CGColorSpaceCreateDeviceGray(), CG.kCGImageAlphaNone)
+    if context is None:
+        return image
+    CG.CGContextDrawImage(context, CG.CGRectMake(0, 0, width, height), image)
+    return CG.CGBitmapContextCreateImage(context) or image
+
+def capture_rect_in_process(bounds, output_path):
+    """Capture a screen rect straight to a PNG with CoreGraphics, without spawning screencapture.
+
+    Returns False if the capture isn't possible so the caller can fall back.
+    """
+    global CG_CAPTURE_AVAILABLE
+    try:
+        load_core_graphics()
+        import Quartz
+        from Foundation import NSURL
+        rect = CG.CGRectMake(bounds['X'], bounds['Y'], bounds['Width'], bounds['Height'])
+        window_id = bounds.get('WindowID')
+        if window_id:
+            # Only the window itself, clipped to rect: overlapping windows and the
+            # window's shadow are left out
+            image = CG.CGWindowListCreateImage(
+                rect, CG.kCGWindowListOptionIncludingWindow, window_id, CG.kCGWindowImageBoundsIgnoreFraming)
+        else:
+            image = CG.CGWindowListCreateImage(
+                rect, CG.kCGWindowListOptionOnScreenOnly, CG.kCGNullWindowID, CG.kCGWindowImageDefault)
+    except (ImportError, AttributeError) as e:
+        print(f"  In-process capture unavailable, using screencapture: {e}")
+        CG_CAPTURE_AVAILABLE = False
+        return False
+    
+    # No image usually means Screen Recording permission was refused
+    if image is None:
+        return False
+    if args is None or not args.color:
+        image = convert_to_grayscale(image)
+    destination = Quartz.CGImageDestinationCreateWithURL(
+        NSURL.fileURLWithPath_(output_path), IMAGE_TYPES[IMAGE_FORMAT], 1, None)
+    if destination is None:
+        return False
+    properties = None
+    if IMAGE_FORMAT != 'png':
+        properties = {Quartz.kCGImageDestinationLossyCompressionQuality: HEIC_QUALITY}
+    Quartz.CGImageDestinationAddImage(destination, image, properties)
+    return bool(Quartz.CGImageDestinationFinalize(destination))
+
 def capture_window_screencapture(bounds, app_name, output_path):
-    """Capture window using screencapture with real-time cropping."""
+    """Capture window with CoreGraphics (or the screencapture tool as a fallback) with real-time cropping.
+
+    The PNG is written to a hidden file beside output_path and renamed into
+    place, so an interrupted capture never leaves a truncated file there.
+    """
+    partial_path = os.path.join(os.path.dirname(output_path), '.' + os.path.basename(output_path))
+    try:
+        captured = capture_window_to_file(bounds, app_name, partial_path)
+        if captured:
+            os.replace(partial_path, output_path)
+        return captured
+    except OSError as e:
+        print(f"  ❌ Could not move capture into place: {e}")
+        return False
+    finally:
+        if os.path.exists(partial_path):
+            os.remove(partial_path)
+
+def capture_window_to_file(bounds, app_name, output_path):
+    """Capture the (cropped) window bounds to output_path; returns True on success."""
     try:
         # Apply app-specific cropping if configured
         # Handle case where args might be None (e.g., in tests)
         if args is None or not args.no_crop:
             bounds = calculate_cropped_bounds(bounds, app_name)
         
+        # Window bounds are global display coordinates, which CoreGraphics takes directly
+        if CG_CAPTURE_AVAILABLE and capture_rect_in_process(bounds, output_path):
+            file_size_kb = os.path.getsize(output_path) / 1024
+            print(f"  ✅ Captured in-process: {describe_image(output_path)} | File size: {file_size_kb:.1f} KB")
+            return True
+        
         # Determine display ID
         display_id = get_display_id_for_window(bounds)
         
@@ -204,18 +587,20 @@ def capture_window_screencapture(bounds, app_name, output_path):
             '-x',  # No sound
             '-o',  # No window shadows (faster, cleaner)
             '-a',  # No attached windows (cleaner capture)
+            '-t', IMAGE_FORMAT,
             output_path
         ]
         
-        print(f"  Running screencapture: {' '.join(cmd)}")
+        if DEBUG:
+            print(f"  Running screencapture: {' '.join(cmd)}")
         result = subprocess.run(cmd, capture_output=True, text=True, timeout=10)
         
         if result.returncode == 0 and os.path.exists(output_path):
             # Get image info for logging
             try:
-                image = Image.open(output_path)
+                image_size = describe_image(output_path)
                 file_size_kb = os.path.getsize(output_path) / 1024
-                print(f"  ✅ Screencapture successful: {image.size} | File size: {file_size_kb:.1f} KB")
+                print(f"  ✅ Screencapture successful: {image_size} | File size: {file_size_kb:.1f} KB")
                 return True
             except Exception as e:
                 print(f"  ⚠️  Screencapture completed but couldn't verify image: {e}")
@@ -228,55 +613,89 @@ def capture_window_screencapture(bounds, app_name, output_path):
         print(f"  ❌ Screencapture error: {e}")
         return False
 
-def get_focused_window_rect():
+def get_focused_window_rect(owner_name=None):
+    """Return the bounds of the frontmost normal window, preferring one owned by owner_name.
+
+    The bounds dict also carries the window's CGWindowID as 'WindowID'.
+    """
+    load_core_graphics()
     CGWindowListCopyWindowInfo = getattr(CG, 'CGWindowListCopyWindowInfo')
     kCGWindowListOptionOnScreenOnly = getattr(CG, 'kCGWindowListOptionOnScreenOnly')
+    kCGWindowListExcludeDesktopElements = getattr(CG, 'kCGWindowListExcludeDesktopElements')
     kCGNullWindowID = getattr(CG, 'kCGNullWindowID')
+    # Leaving out desktop elements shrinks the list CoreGraphics builds for us
     windows = CGWindowListCopyWindowInfo(
-        kCGWindowListOptionOnScreenOnly, kCGNullWindowID)
-    # Find the frontmost, non-desktop, non-hidden window
+        kCGWindowListOptionOnScreenOnly | kCGWindowListExcludeDesktopElements, kCGNullWindowID)
+    # Windows come front to back; find the frontmost non-desktop, non-hidden window,
+    # skipping other apps' windows (e.g. floating overlays) when the owner is known
+    fallback = None
     for w in windows:
         if w.get('kCGWindowLayer', 0) == 0 and w.get('kCGWindowOwnerName') and w.get('kCGWindowBounds'):
-            bounds = w['kCGWindowBounds']
-            return bounds
-    return None
+            if owner_name is None or w['kCGWindowOwnerName'] == owner_name:
+                return dict(w['kCGWindowBounds'], WindowID=w.get('kCGWindowNumber'))
+            if fallback is None:
+                fallback = dict(w['kCGWindowBounds'], WindowID=w.get('kCGWindowNumber'))
+    return fallback
+
+def get_active_app_info():
+    """Return raw app name, sanitized version, window title and static text.
 
-def get_active_app_names():
-    """Return raw app name, sanitized version, and window title."""
+    The static text is only fetched for text_extraction_apps and is empty otherwise.
+    """
     try:
-        # Get both app name and window title in a single AppleScript call
-        # Using a simple separator for better performance
-        result = subprocess.check_output([
-            'osascript', '-e', 'tell application "System Events" to set frontApp to first application process whose frontmost is true' + '\n' +
-                             'set appName to name of frontApp' + '\n' +
-                             'try' + '\n' +
-                             '  set windowTitle to name of front window of frontApp' + '\n' +
-                             'on error' + '\n' +
-                             '  set windowTitle to ""' + '\n' +
-                             'end try' + '\n' +
-                             'return appName & "|||" & windowTitle'
-        ]).decode().strip()
-        
-        # Parse the result using simple string split
-        if "|||" in result:
-            raw_name, window_title = result.split("|||", 1)
-        else:
-            raw_name = result
-            window_title = ""
-            
+        result = run_applescript(APP_INFO_SCRIPT)
+        raw_name, window_title, static_text = (result.split("|||", 2) + ["", ""])[:3]
     except Exception as e:
         print(f"Error getting app info: {e}")
-        raw_name = "UnknownApp"
-        window_title = ""
+        raw_name, window_title, static_text = "UnknownApp", "", ""
+    
+    safe_name = sanitize_app_name(raw_name)
+    if DEBUG:
+        print("Active app name:", safe_name, "with window title:", window_title)
+    return raw_name, safe_name, window_title, TEXT_SEPARATOR_RE.sub('\n', static_text).strip()
+
+# Longest text saved per capture; longer page text (e.g. infinite-scroll feeds)
+# keeps its start and end, which carry the page's context, and drops the middle
+MAX_TEXT_CHARS = int(os.environ.get('ACTIVITY_LENS_MAX_TEXT_CHARS', '65536'))
+TRUNCATION_MARKER = '\n...[truncated]...\n'
+
+def truncate_text(text, limit=None):
+    """Return text cut down to its head and tail if it is longer than limit characters."""
+    limit = MAX_TEXT_CHARS if limit is None else limit
+    if len(text) <= limit:
+        return text
+    half = limit // 2
+    return text[:half] + TRUNCATION_MARKER + text[-half:]
+
+# Digest of the last text saved for each (app, window title) today, so a page
+# or document that hasn't changed isn't written to another .txt file
+last_text_digests = {}
+
+def write_text_entry(app_name, now, text, window_title="", output_json=None):
+    """Save text to a .txt file and append a metadata entry to the JSON log.
+
+    now is the capture's datetime; the filename and entry timestamp are both
+    formatted from it. Text identical to the last save for the same window is
+    only logged as metadata.
+    """
+    original_length = len(text)
+    text = truncate_text(text)
+    
+    if text.strip():
+        key = (app_name, window_title)
+        digest = hashlib.blake2b(text.encode('utf-8'), digest_size=16).digest()
+        if last_text_digests.get(key) == digest:
+            append_metadata({
+                'app_name': app_name,
+                'timestamp': now.isoformat(timespec='seconds'),
+                'window_title': window_title
+            })
+            print(f"Text unchanged, skipped saving text for {app_name}")
+            return
+        last_text_digests[key] = digest
     
-    safe_name = "".join(c if c.isalnum() else "_" for c in raw_name)
-    print("Active app name:", safe_name, "with window title:", window_title)
-    return raw_name, safe_name, window_title
-
-def write_text_entry(app_name, timestamp, text, window_title="", output_json=JSON_PATH):
-    """Save text to a .txt file and write a metadata entry to JSON."""
     # Create human-readable filename: "YYYYMMDD HHMMSS - AppName.txt"
-    ts_readable = f"{timestamp[:8]} {timestamp[9:] if '_' in timestamp else timestamp[8:]}"
+    ts_readable = now.strftime("%Y%m%d %H%M%S")
     txt_filename = f"{ts_readable} - {app_name}.txt"
     txt_path = os.path.join(SCREEN_DIR, txt_filename)
 
@@ -292,38 +711,54 @@ def write_text_entry(app_name, timestamp, text, window_title="", output_json=JSO
     entry = {
         'screen_text_filename': fname,
         'app_name': app_name,
-        'timestamp': datetime.strptime(timestamp, "%Y%m%d_%H%M%S").isoformat(),
+        'timestamp': now.isoformat(timespec='seconds'),
         'window_title': window_title
     }
+    if original_length > len(text):
+        entry['original_length'] = original_length
     append_metadata(entry)
-    print(f"Text extracted and saved to {output_json}")
+    print(f"Text extracted and saved to {output_json or JSON_PATH}")
+
+# Skip the screenshot when the app, title and window bounds match the last
+# capture, but re-capture at least this often in case the content changed
+UNCHANGED_RECAPTURE_SECONDS = 120
+last_capture_state = None
+last_capture_time = 0.0
 
 def capture_focused_window():
     """
     Tries to extract visible text from the AXTree. If unsuccessful, captures a screenshot of the currently focused window and saves it as PNG.
     """
+    global last_capture_state, last_capture_time
     try:
-        raw_app_name, app_name, window_title = get_active_app_names()
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        raw_app_name, app_name, window_title, static_text = get_active_app_info()
+        # Read the clock once; every path and entry for this capture derives from it
+        now = datetime.now()
+        refresh_date_paths(now)
+        iso_timestamp = now.isoformat(timespec='seconds')
         text = ""
         
+        category = APP_CATEGORIES.get(raw_app_name)
+        # Metadata-only apps may also be listed by their sanitized name
+        if APP_CATEGORIES.get(app_name) == 'metadata_only':
+            category = 'metadata_only'
+        
         # Check if this app should only record metadata (no PNG, no text)
-        # Check both raw name and sanitized name for flexibility
-        if raw_app_name in metadata_only_apps or app_name in metadata_only_apps:
+        if category == 'metadata_only':
             # Just record metadata; no file written
             metadata = {
                 'app_name': app_name,
-                'timestamp': datetime.strptime(timestamp, "%Y%m%d_%H%M%S").isoformat(),
+                'timestamp': iso_timestamp,
                 'window_title': window_title
             }
             append_metadata(metadata)
             return
         
         # Try text extraction for browsers and apps where it's likely to work
-        if raw_app_name in browser_apps:
-            window_title, text = grab_browser_content()
-        elif raw_app_name in text_extraction_apps:
-            text = grab_generic_text()
+        if category == 'browser':
+            window_title, text = grab_browser_content(raw_app_name)
+        elif category == 'text':
+            text = static_text
             # If extracted text length is insignificantly small, treat as no text
             if len(text.strip()) < 10:
                 print(f"Warning: Text length is insignificantly small: {len(text.strip())}")
@@ -333,20 +768,33 @@ def capture_focused_window():
             text = ""
 
         if text.strip():
-            write_text_entry(app_name, timestamp, text, window_title)
+            write_text_entry(app_name, now, text, window_title)
             return
         if not text:
             # Fallback to optimized screenshot for OCR
-            bounds = get_focused_window_rect()
+            bounds = get_focused_window_rect(raw_app_name)
             if not bounds:
                 print("No active window found or cannot get window geometry.")
                 return
             
-            print(f"  Window bounds: {bounds['X']}, {bounds['Y']}, {bounds['Width']}x{bounds['Height']}")
+            if DEBUG:
+                print(f"  Window bounds: {bounds['X']}, {bounds['Y']}, {bounds['Width']}x{bounds['Height']}")
+            
+            state = (app_name, window_title, bounds['X'], bounds['Y'], bounds['Width'], bounds['Height'])
+            if (state == last_capture_state and
+                    time.monotonic() - last_capture_time < UNCHANGED_RECAPTURE_SECONDS):
+                # Same window as last time; record the activity without a new screenshot
+                append_metadata({
+                    'app_name': app_name,
+                    'timestamp': iso_timestamp,
+                    'window_title': window_title
+                })
+                print(f"Window unchanged, skipped screenshot for {app_name}")
+                return
             
             # Use unified screencapture approach with real-time cropping
-            ts_readable = f"{timestamp[:8]} {timestamp[9:] if '_' in timestamp else timestamp[8:]}"
-            filename = os.path.join(SCREEN_DIR, f"{ts_readable} - {app_name}.png")
+            ts_readable = now.strftime("%Y%m%d %H%M%S")
+            filename = os.path.join(SCREEN_DIR, f"{ts_readable} - {app_name}.{IMAGE_FORMAT}")
             
             # Capture using screencapture with real-time cropping
             if capture_window_screencapture(bounds, app_name, filename):
@@ -354,17 +802,18 @@ def capture_focused_window():
                 entry = {
                     'screen_capture_filename': os.path.basename(filename),
                     'app_name': app_name,
-                    'timestamp': datetime.strptime(timestamp, "%Y%m%d_%H%M%S").isoformat(),
+                    'timestamp': iso_timestamp,
                     'window_title': window_title
                 }
                 append_metadata(entry)
+                last_capture_state, last_capture_time = state, time.monotonic()
                 print(f"Screenshot saved as: {filename}")
             else:
                 print(f"Failed to capture screenshot for {app_name}")
                 # Fall back to just recording metadata without screenshot
                 entry = {
                     'app_name': app_name,
-                    'timestamp': datetime.strptime(timestamp, "%Y%m%d_%H%M%S").isoformat(),
+                    'timestamp': iso_timestamp,
                     'window_title': window_title
                 }
                 append_metadata(entry)
@@ -373,20 +822,74 @@ def capture_focused_window():
     except Exception as e:
         print(f"Error capturing screenshot or extracting text: {e}")
 
+# Wait this long after an app switch before capturing, so quickly cycling
+# through apps (e.g. with Cmd+Tab) produces one capture instead of several
+FOCUS_CHANGE_DEBOUNCE_SECONDS = 0.5
+
+def watch_app_activations(callback):
+    """Call callback on the main thread whenever another app becomes frontmost."""
+    center = NSWorkspace.sharedWorkspace().notificationCenter()
+    return center.addObserverForName_object_queue_usingBlock_(
+        NSWorkspaceDidActivateApplicationNotification, None, NSOperationQueue.mainQueue(),
+        lambda notification: callback())
+
+# Longest single run loop wait; Python only sees Ctrl+C once the run loop returns
+RUN_LOOP_SLICE_SECONDS = 1.0
+
+def wait_for_events(seconds):
+    """Wait up to seconds, returning early to deliver an app-switch notification when AppKit is available."""
+    if not APPKIT_AVAILABLE:
+        time.sleep(seconds)
+        return
+    
+    seconds = min(seconds, RUN_LOOP_SLICE_SECONDS)
+    run_loop = NSRunLoop.currentRunLoop()
+    # A run loop with no sources returns immediately; the timer makes it wait
+    timer = NSTimer.timerWithTimeInterval_repeats_block_(seconds, False, lambda timer: None)
+    run_loop.addTimer_forMode_(timer, NSDefaultRunLoopMode)
+    run_loop.runMode_beforeDate_(NSDefaultRunLoopMode, NSDate.dateWithTimeIntervalSinceNow_(seconds))
+    timer.invalidate()
+
 def capture_focused_window_continuous(interval=15):
     """
-    Continuously captures screenshots or text of the focused window every specified interval.
+    Continuously captures screenshots or text of the focused window every specified interval,
+    and shortly after every app switch.
     Args:
         interval (int): Time interval between captures in seconds (default: 15)
     """
     print(f"Starting continuous capture every {interval} seconds...")
     print("Press Ctrl+C to stop")
     print("💤 Your Mac can sleep normally - this script won't prevent it")
+    
+    focus_changed_at = None
+    
+    def on_app_activated():
+        nonlocal focus_changed_at
+        focus_changed_at = time.monotonic()
+    
+    if APPKIT_AVAILABLE:
+        watch_app_activations(on_app_activated)
+    
+    next_capture = time.monotonic()
     try:
         while True:
-            capture_focused_window()
-            # Use time.sleep which allows the system to sleep
-            time.sleep(interval)
+            # The loop runs for days without returning to a Cocoa run loop that would
+            # drain autoreleased NSAppleScript, CoreGraphics and NSRunLoop objects
+            with autorelease_pool():
+                now = time.monotonic()
+                # Capture once an app switch has settled, then restart the interval from there
+                if focus_changed_at is not None and now - focus_changed_at >= FOCUS_CHANGE_DEBOUNCE_SECONDS:
+                    focus_changed_at = None
+                    next_capture = now
+                if now >= next_capture:
+                    capture_focused_window()
+                    next_capture = time.monotonic() + interval
+                
+                wake_at = next_capture
+                if focus_changed_at is not None:
+                    wake_at = min(wake_at, focus_changed_at + FOCUS_CHANGE_DEBOUNCE_SECONDS)
+                # Sleeping (or running the run loop) still lets the system sleep
+                wait_for_events(max(wake_at - time.monotonic(), 0.01))
     except KeyboardInterrupt:
         print("\nCapture stopped by user")
 
@@ -398,11 +901,9 @@ def slack_get_title_and_messages() -> tuple[str, str]:
     Returns (window_title, message_text) for the front-most Slack window.
     If anything fails, returns ("", "").
     """
-    script_path = os.path.join(os.path.dirname(__file__), 'slack_script.scpt')
+    script_path = os.path.join(SCRIPT_DIR, 'slack_script.scpt')
     try:
-        raw = subprocess.check_output(
-            ['osascript', script_path]
-        ).decode('utf-8', errors='ignore').strip()
+        raw = run_applescript_file(script_path)
         
         # Parse the JSON response
         data = json.loads(raw)
@@ -437,6 +938,8 @@ if __name__ == "__main__":
                        help='Interval between captures in seconds (default: 15)')
     parser.add_argument('--no-crop', action='store_true',
                        help='Disable app-specific cropping for testing')
+    parser.add_argument('--color', action='store_true',
+                       help='Keep captures in color instead of saving grayscale PNGs (screencapture fallback captures are always in color)')
     parser.add_argument('--fast', action='store_true',
                        help='Use faster capture mode (logical resolution, not Retina)')
     
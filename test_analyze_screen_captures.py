@@ -7,10 +7,12 @@ Tests the screen capture analysis functionality with mocked dependencies.
 import unittest
 import os
 import json
+import hashlib
 import tempfile
 import shutil
 from unittest.mock import patch, MagicMock, mock_open
 from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
 
 # Import the module to test
 import analyze_screen_captures
@@ -25,8 +27,19 @@ class TestAnalyzeScreenCaptures(unittest.TestCase):
         self.original_cache_dir = analyze_screen_captures.CACHE_DIR
         analyze_screen_captures.CACHE_DIR = self.temp_dir
         analyze_screen_captures.input_dir = os.path.join(self.temp_dir, 'screen-captures')
-        analyze_screen_captures.output_json = os.path.join(self.temp_dir, 'screen_captures_ocr.json')
-        analyze_screen_captures.summary_cache_file = os.path.join(self.temp_dir, 'summary_cache.json')
+        analyze_screen_captures.output_json = os.path.join(self.temp_dir, 'screen_captures_ocr.jsonl')
+        analyze_screen_captures.summary_cache_file = os.path.join(self.temp_dir, 'summary_cache.db')
+        analyze_screen_captures.legacy_summary_cache_file = os.path.join(self.temp_dir, 'summary_cache.json')
+        analyze_screen_captures.ocr_cache_dir = os.path.join(self.temp_dir, 'ocr_cache')
+        analyze_screen_captures.legacy_ocr_cache_file = os.path.join(self.temp_dir, 'ocr_cache.json')
+        
+        # Reset the in-memory summary cache and progress debouncing
+        analyze_screen_captures.SUMMARY_CACHE = None
+        analyze_screen_captures.summary_cache_pending = {}
+        analyze_screen_captures.SUMMARY_INFLIGHT.clear()
+        analyze_screen_captures.progress_unsaved = 0
+        analyze_screen_captures.last_progress_save = 0.0
+        analyze_screen_captures.memory_reading = None
         
         # Create necessary directories
         os.makedirs(analyze_screen_captures.input_dir, exist_ok=True)
@@ -49,8 +62,11 @@ class TestAnalyzeScreenCaptures(unittest.TestCase):
         # Restore original paths
         analyze_screen_captures.CACHE_DIR = self.original_cache_dir
         analyze_screen_captures.input_dir = os.path.join(self.original_cache_dir, 'screen-captures')
-        analyze_screen_captures.output_json = os.path.join(self.original_cache_dir, 'screen_captures_ocr.json')
-        analyze_screen_captures.summary_cache_file = os.path.join(self.original_cache_dir, 'summary_cache.json')
+        analyze_screen_captures.output_json = os.path.join(self.original_cache_dir, 'screen_captures_ocr.jsonl')
+        analyze_screen_captures.summary_cache_file = os.path.join(self.original_cache_dir, 'summary_cache.db')
+        analyze_screen_captures.legacy_summary_cache_file = os.path.join(self.original_cache_dir, 'summary_cache.json')
+        analyze_screen_captures.ocr_cache_dir = os.path.join(self.original_cache_dir, 'ocr_cache')
+        analyze_screen_captures.legacy_ocr_cache_file = os.path.join(self.original_cache_dir, 'ocr_cache.json')
         
         # Remove temporary directory
         shutil.rmtree(self.temp_dir, ignore_errors=True)
@@ -69,14 +85,27 @@ class TestAnalyzeScreenCaptures(unittest.TestCase):
     
     def test_load_summary_cache_existing_file(self):
         """Test loading summary cache from existing file."""
-        # Create cache file with sample data
         sample_cache = {'hash1': 'summary1', 'hash2': 'summary2'}
-        with open(analyze_screen_captures.summary_cache_file, 'w', encoding='utf-8') as f:
+        analyze_screen_captures.save_summary_cache(sample_cache)
+        
+        cache = analyze_screen_captures.load_summary_cache()
+        
+        self.assertEqual(cache, sample_cache)
+    
+    def test_load_summary_cache_migrates_json(self):
+        """Test that the old JSON summary cache is imported into SQLite once."""
+        sample_cache = {'hash1': 'summary1', 'hash2': ''}
+        with open(analyze_screen_captures.legacy_summary_cache_file, 'w', encoding='utf-8') as f:
             json.dump(sample_cache, f)
         
         cache = analyze_screen_captures.load_summary_cache()
         
         self.assertEqual(cache, sample_cache)
+        self.assertFalse(os.path.exists(analyze_screen_captures.legacy_summary_cache_file))
+        self.assertTrue(os.path.exists(analyze_screen_captures.legacy_summary_cache_file + '.migrated'))
+        
+        # Later loads read the migrated rows from SQLite
+        self.assertEqual(analyze_screen_captures.load_summary_cache(), sample_cache)
     
     def test_load_summary_cache_corrupted_file(self):
         """Test loading summary cache from corrupted file."""
@@ -95,18 +124,60 @@ class TestAnalyzeScreenCaptures(unittest.TestCase):
     
     def test_save_summary_cache(self):
         """Test saving summary cache."""
-        sample_cache = {'hash1': 'summary1', 'hash2': 'summary2'}
-        
-        analyze_screen_captures.save_summary_cache(sample_cache)
+        self.assertTrue(analyze_screen_captures.save_summary_cache({'hash1': 'summary1', 'hash2': 'summary2'}))
         
         # Check if file was saved
         self.assertTrue(os.path.exists(analyze_screen_captures.summary_cache_file))
         
-        # Check content
-        with open(analyze_screen_captures.summary_cache_file, 'r', encoding='utf-8') as f:
-            saved_cache = json.load(f)
+        # Saving only adds or replaces the given rows
+        analyze_screen_captures.save_summary_cache({'hash2': 'updated', 'hash3': 'summary3'})
+        saved_cache = analyze_screen_captures.load_summary_cache()
+        
+        self.assertEqual(saved_cache, {'hash1': 'summary1', 'hash2': 'updated', 'hash3': 'summary3'})
+    
+    def test_ocr_cache_round_trip(self):
+        """Test saving and loading OCR cache entries."""
+        self.assertIsNone(analyze_screen_captures.load_cached_ocr_text('pnghash1'))
+        
+        analyze_screen_captures.save_cached_ocr_text('pnghash1', 'ocr text 1')
         
-        self.assertEqual(saved_cache, sample_cache)
+        self.assertEqual(analyze_screen_captures.load_cached_ocr_text('pnghash1'), 'ocr text 1')
+        self.assertTrue(os.path.exists(os.path.join(analyze_screen_captures.ocr_cache_dir, 'pnghash1.txt')))
+    
+    def test_migrate_legacy_ocr_cache(self):
+        """Test that the old JSON OCR cache is split into per-hash files."""
+        with open(analyze_screen_captures.legacy_ocr_cache_file, 'w', encoding='utf-8') as f:
+            json.dump({'pnghash1': 'ocr text 1', 'pnghash2': ''}, f)
+        
+        analyze_screen_captures.migrate_legacy_ocr_cache()
+        
+        self.assertEqual(analyze_screen_captures.load_cached_ocr_text('pnghash1'), 'ocr text 1')
+        self.assertEqual(analyze_screen_captures.load_cached_ocr_text('pnghash2'), '')
+        self.assertFalse(os.path.exists(analyze_screen_captures.legacy_ocr_cache_file))
+    
+    def test_get_file_hash(self):
+        """Test hashing PNG bytes for the OCR cache."""
+        png_hash = analyze_screen_captures.get_file_hash(self.png_path)
+        
+        # Same bytes should give the same 32-character hex digest
+        self.assertEqual(png_hash, analyze_screen_captures.get_file_hash(self.png_path))
+        self.assertEqual(len(png_hash), 32)
+        
+        # Missing files can't be hashed
+        missing_path = os.path.join(analyze_screen_captures.input_dir, 'missing.png')
+        self.assertIsNone(analyze_screen_captures.get_file_hash(missing_path))
+    
+    def test_get_file_sizes(self):
+        """Test that file sizes are collected in one directory scan."""
+        with open(os.path.join(analyze_screen_captures.input_dir, 'big.png'), 'wb') as f:
+            f.write(b'x' * 100)
+        os.makedirs(os.path.join(analyze_screen_captures.input_dir, 'subdir'))
+        
+        sizes = analyze_screen_captures.get_file_sizes(analyze_screen_captures.input_dir)
+        
+        self.assertEqual(sizes['big.png'], 100)
+        self.assertIn('test.png', sizes)
+        self.assertNotIn('subdir', sizes)
     
     @patch('analyze_screen_captures.psutil.virtual_memory')
     def test_check_memory_usage_normal(self, mock_memory):
@@ -148,6 +219,19 @@ class TestAnalyzeScreenCaptures(unittest.TestCase):
         
         self.assertTrue(result)  # Should return True on exception
     
+    @patch('analyze_screen_captures.psutil.virtual_memory')
+    def test_check_memory_usage_reuses_recent_reading(self, mock_memory):
+        """Test that memory is only re-read after MEMORY_CHECK_INTERVAL."""
+        mock_memory.return_value.percent = 50.0
+        
+        with patch('analyze_screen_captures.time.time', side_effect=[100.0, 100.5, 101.5]):
+            analyze_screen_captures.check_memory_usage()
+            analyze_screen_captures.check_memory_usage()
+            self.assertEqual(mock_memory.call_count, 1)
+            
+            analyze_screen_captures.check_memory_usage()
+            self.assertEqual(mock_memory.call_count, 2)
+    
     def test_check_memory_usage_no_psutil(self):
         """Test memory usage check when psutil is not available."""
         # Temporarily disable psutil
@@ -202,7 +286,44 @@ class TestAnalyzeScreenCaptures(unittest.TestCase):
         
         self.assertEqual(models, [])
     
-    @patch('analyze_screen_captures.requests.post')
+    def test_compact_screen_text(self):
+        """Test that OCR text is compacted before it is sent to Ollama."""
+        text = "File   Edit  View\n\nInbox (3)\nFile Edit View\n   Meeting notes  \nInbox (3)\n"
+        
+        self.assertEqual(analyze_screen_captures.compact_screen_text(text),
+                         "File Edit View\nInbox (3)\nMeeting notes")
+        
+        long_text = "\n".join(f"line {i}" for i in range(2000))
+        self.assertEqual(len(analyze_screen_captures.compact_screen_text(long_text)),
+                         analyze_screen_captures.SUMMARY_MAX_CHARS)
+    
+    def test_get_ollama_options(self):
+        """Test that Ollama options follow the configured settings."""
+        with patch.object(analyze_screen_captures, 'SUMMARY_NUM_CTX', 2048), \
+             patch.object(analyze_screen_captures, 'SUMMARY_NUM_BATCH', None):
+            options = analyze_screen_captures.get_ollama_options()
+        self.assertEqual(options['num_ctx'], 2048)
+        self.assertNotIn('num_batch', options)
+        
+        with patch.object(analyze_screen_captures, 'SUMMARY_NUM_BATCH', '128'):
+            options = analyze_screen_captures.get_ollama_options()
+        self.assertEqual(options['num_batch'], 128)
+    
+    def test_load_prompt_template(self):
+        """Test loading the prompt template and its fallback."""
+        prompt_path = os.path.join(self.temp_dir, 'prompt.txt')
+        with open(prompt_path, 'w', encoding='utf-8') as f:
+            f.write('Describe the activity\n')
+        
+        with patch.object(analyze_screen_captures, 'prompt_file', prompt_path):
+            self.assertEqual(analyze_screen_captures.load_prompt_template(), 'Describe the activity')
+        
+        missing_path = os.path.join(self.temp_dir, 'missing.txt')
+        with patch.object(analyze_screen_captures, 'prompt_file', missing_path):
+            self.assertEqual(analyze_screen_captures.load_prompt_template(),
+                             "Summarize this text in 1-2 sentences: {text}")
+    
+    @patch('analyze_screen_captures.OLLAMA_SESSION.post')
     def test_summarize_with_ollama_success(self, mock_post):
         """Test successful summarization with Ollama."""
         # Mock successful response
@@ -221,8 +342,16 @@ class TestAnalyzeScreenCaptures(unittest.TestCase):
         summary, is_cache_hit = summary_result
         self.assertEqual(summary, 'This is a test summary')
         self.assertFalse(is_cache_hit)
+        
+        # Requests go through the shared session and keep the model loaded
+        payload = mock_post.call_args[1]['json']
+        self.assertEqual(payload['keep_alive'], analyze_screen_captures.OLLAMA_KEEP_ALIVE)
+        
+        # The static instructions are sent as the system prompt, apart from the screen text
+        self.assertEqual(payload['system'], analyze_screen_captures.PROMPT_TEMPLATE)
+        self.assertTrue(payload['prompt'].startswith('Application: TestApp\nWindow Title: Test Window'))
 
-    @patch('analyze_screen_captures.requests.post')
+    @patch('analyze_screen_captures.OLLAMA_SESSION.post')
     def test_summarize_with_ollama_api_error(self, mock_post):
         """Test summarization with API error."""
         # Mock error response
@@ -241,7 +370,7 @@ class TestAnalyzeScreenCaptures(unittest.TestCase):
         self.assertIsNone(summary)
         self.assertFalse(is_cache_hit)
 
-    @patch('analyze_screen_captures.requests.post')
+    @patch('analyze_screen_captures.OLLAMA_SESSION.post')
     def test_summarize_with_ollama_exception(self, mock_post):
         """Test summarization with exception."""
         # Mock exception
@@ -266,8 +395,8 @@ class TestAnalyzeScreenCaptures(unittest.TestCase):
         with patch('analyze_screen_captures.load_summary_cache') as mock_load_cache:
             mock_load_cache.return_value = mock_cache
             
-            # Mock get_normalized_content_hash to return our test hash
-            with patch('analyze_screen_captures.get_normalized_content_hash') as mock_hash:
+            # Mock hash_normalized_content to return our test hash
+            with patch('analyze_screen_captures.hash_normalized_content') as mock_hash:
                 mock_hash.return_value = 'test_hash'
                 
                 summary_result = analyze_screen_captures.summarize_with_ollama(
@@ -278,6 +407,67 @@ class TestAnalyzeScreenCaptures(unittest.TestCase):
         self.assertEqual(summary, 'Cached summary')
         self.assertTrue(is_cache_hit)
 
+    def test_summarize_with_ollama_shares_inflight_request(self):
+        """Test that concurrent summaries of the same content send one request."""
+        import threading
+        text = 'Identical screen content that is long enough to be summarized. ' * 5
+        request_started = threading.Event()
+        release_request = threading.Event()
+        
+        def slow_post(*args, **kwargs):
+            request_started.set()
+            release_request.wait(5)
+            response = MagicMock(status_code=200)
+            response.json.return_value = {'response': 'Shared summary'}
+            return response
+        
+        results = []
+        with patch('analyze_screen_captures.load_summary_cache', return_value={}), \
+             patch('analyze_screen_captures.OLLAMA_SESSION.post', side_effect=slow_post) as mock_post:
+            owner = threading.Thread(target=lambda: results.append(
+                analyze_screen_captures.summarize_with_ollama(text, 'TestApp', '', 'llama3.2:3b')))
+            owner.start()
+            self.assertTrue(request_started.wait(5))
+            
+            waiter = threading.Thread(target=lambda: results.append(
+                analyze_screen_captures.summarize_with_ollama(text, 'TestApp', '', 'llama3.2:3b')))
+            waiter.start()
+            release_request.set()
+            owner.join(5)
+            waiter.join(5)
+        
+        mock_post.assert_called_once()
+        self.assertEqual(sorted(results), [('Shared summary', False), ('Shared summary', True)])
+        self.assertEqual(analyze_screen_captures.SUMMARY_INFLIGHT, {})
+
+    def test_summarize_with_ollama_legacy_cache_key(self):
+        """Test that summaries cached under the old md5 key are still used."""
+        text = 'Test text content'
+        legacy_hash = hashlib.md5(analyze_screen_captures.normalize_content(text).encode('utf-8')).hexdigest()
+        
+        with patch('analyze_screen_captures.load_summary_cache', return_value={legacy_hash: 'Cached summary'}):
+            summary, is_cache_hit = analyze_screen_captures.summarize_with_ollama(
+                text, 'TestApp', 'Test Window', 'llama3.2:3b'
+            )
+        
+        self.assertEqual(summary, 'Cached summary')
+        self.assertTrue(is_cache_hit)
+        
+        # The entry is re-keyed under the new hash
+        new_hash = analyze_screen_captures.get_normalized_content_hash(text)
+        self.assertNotEqual(new_hash, legacy_hash)
+        self.assertEqual(analyze_screen_captures.get_summary_cache()[new_hash], 'Cached summary')
+
+    def test_summarize_with_ollama_normalizes_once(self):
+        """Test that a cache miss normalizes the text once for both the new and md5 keys."""
+        text = 'Short text'
+        
+        with patch('analyze_screen_captures.load_summary_cache', return_value={}), \
+             patch('analyze_screen_captures.normalize_content', wraps=analyze_screen_captures.normalize_content) as mock_normalize:
+            analyze_screen_captures.summarize_with_ollama(text, 'TestApp', 'Test Window', 'llama3.2:3b')
+        
+        mock_normalize.assert_called_once_with(text)
+
     def test_ocr_processing_logic(self):
         """Test OCR processing logic with mocked dependencies."""
         # This test verifies the OCR processing logic works correctly
@@ -295,6 +485,128 @@ class TestAnalyzeScreenCaptures(unittest.TestCase):
         self.assertIn('test.png', png_filepath)
         self.assertIn('test.txt', text_filepath)
     
+    @patch('analyze_screen_captures.preprocess_for_ocr', side_effect=lambda image: image)
+    @patch('analyze_screen_captures.pytesseract.image_to_string')
+    @patch('analyze_screen_captures.Image.open')
+    def test_process_ocr_returns_text(self, mock_image_open, mock_ocr, mock_preprocess):
+        """Test that process_ocr returns the OCR text instead of mutating shared state."""
+        mock_image_open.return_value = MagicMock(mode='L')
+        mock_ocr.return_value = 'Extracted text\n'
+
+        filename, text, success = analyze_screen_captures.process_ocr(self.png_path, 'test.png')
+
+        self.assertEqual(filename, 'test.png')
+        self.assertEqual(text, 'Extracted text\n')
+        self.assertTrue(success)
+        # The worker must not write the text file itself
+        self.assertFalse(os.path.exists(os.path.join(analyze_screen_captures.input_dir, 'test.txt')))
+
+    @patch('analyze_screen_captures.time.sleep')
+    @patch('analyze_screen_captures.Image.open', side_effect=OSError('cannot identify image file'))
+    def test_process_ocr_unreadable_image_not_retried(self, mock_image_open, mock_sleep):
+        """Test that local OCR failures fail fast instead of being retried."""
+        filename, text, success = analyze_screen_captures.process_ocr(self.png_path, 'test.png')
+
+        self.assertFalse(success)
+        self.assertIsNone(text)
+        mock_image_open.assert_called_once()
+        mock_sleep.assert_not_called()
+
+    def test_tesseract_thread_limit(self):
+        """Test that tesseract is limited to one thread per OCR worker by default."""
+        self.assertIn('OMP_THREAD_LIMIT', os.environ)
+
+    @patch('analyze_screen_captures.preprocess_for_ocr', side_effect=lambda image: image)
+    @patch('analyze_screen_captures.Image.open')
+    def test_process_ocr_uses_worker_api(self, mock_image_open, mock_preprocess):
+        """Test that process_ocr reuses the worker's persistent tesseract API."""
+        mock_image = MagicMock(mode='L')
+        mock_image_open.return_value = mock_image
+        mock_api = MagicMock()
+        mock_api.GetUTF8Text.return_value = 'Text from tesserocr'
+
+        with patch.object(analyze_screen_captures, 'worker_tess_api', mock_api):
+            with patch('analyze_screen_captures.pytesseract.image_to_string') as mock_ocr:
+                filename, text, success = analyze_screen_captures.process_ocr(self.png_path, 'test.png')
+                mock_ocr.assert_not_called()
+
+        mock_api.SetImage.assert_called_once_with(mock_image)
+        self.assertEqual(text, 'Text from tesserocr')
+        self.assertTrue(success)
+
+    def test_init_ocr_worker_loads_model_once(self):
+        """Test that each worker creates one tesseract API with the configured language."""
+        mock_tesserocr = MagicMock()
+        with patch.object(analyze_screen_captures, 'TESSEROCR_AVAILABLE', True), \
+             patch.object(analyze_screen_captures, 'tesserocr', mock_tesserocr, create=True), \
+             patch.object(analyze_screen_captures, 'worker_tess_api', None):
+            analyze_screen_captures.init_ocr_worker()
+            self.assertIs(analyze_screen_captures.worker_tess_api, mock_tesserocr.PyTessBaseAPI.return_value)
+
+        mock_tesserocr.PyTessBaseAPI.assert_called_once()
+        self.assertEqual(mock_tesserocr.PyTessBaseAPI.call_args[1]['lang'], analyze_screen_captures.OCR_LANG)
+        self.assertEqual(mock_tesserocr.PyTessBaseAPI.call_args[1]['oem'], analyze_screen_captures.OCR_OEM)
+
+    def test_init_ocr_worker_without_tesserocr(self):
+        """Test that workers fall back to pytesseract when tesserocr is missing."""
+        with patch.object(analyze_screen_captures, 'TESSEROCR_AVAILABLE', False):
+            with patch.object(analyze_screen_captures, 'worker_tess_api', None):
+                analyze_screen_captures.init_ocr_worker()
+                self.assertIsNone(analyze_screen_captures.worker_tess_api)
+
+    def test_preprocess_for_ocr(self):
+        """Test that large captures are downscaled and binarized before OCR."""
+        from PIL import Image
+        image = Image.new('L', (5120, 2880), color=200)
+        image.paste(20, (100, 100, 2000, 400))  # Dark "text" block on a light background
+        
+        processed = analyze_screen_captures.preprocess_for_ocr(image)
+        
+        max_width, max_height = analyze_screen_captures.OCR_MAX_SIZE
+        self.assertLessEqual(processed.width, max_width)
+        self.assertLessEqual(processed.height, max_height)
+        self.assertEqual(sorted(color for count, color in processed.getcolors()), [0, 255])
+    
+    def test_process_ocr_missing_file(self):
+        """Test that process_ocr reports failure for a missing PNG."""
+        missing_path = os.path.join(analyze_screen_captures.input_dir, 'missing.png')
+
+        filename, text, success = analyze_screen_captures.process_ocr(missing_path, 'missing.png')
+
+        self.assertEqual(filename, 'missing.png')
+        self.assertIsNone(text)
+        self.assertFalse(success)
+
+    def test_read_text_file(self):
+        """Test reading text files, including empty ones."""
+        text_path = os.path.join(analyze_screen_captures.input_dir, 'notes.txt')
+        with open(text_path, 'w', encoding='utf-8') as f:
+            f.write('Café notes\n')
+        self.assertEqual(analyze_screen_captures.read_text_file(text_path), 'Café notes\n')
+        
+        empty_path = os.path.join(analyze_screen_captures.input_dir, 'empty.txt')
+        open(empty_path, 'w').close()
+        self.assertEqual(analyze_screen_captures.read_text_file(empty_path), '')
+    
+    def test_save_ocr_text(self):
+        """Test that OCR text is written next to the PNG and recorded on the entry."""
+        entry = dict(self.sample_entry)
+
+        analyze_screen_captures.save_ocr_text(entry, 'Extracted text\n\x0c')
+
+        self.assertEqual(entry['screen_text_filename'], 'test.txt')
+        text_filepath = os.path.join(analyze_screen_captures.input_dir, 'test.txt')
+        with open(text_filepath, 'r', encoding='utf-8') as f:
+            self.assertEqual(f.read(), 'Extracted text')
+
+    def test_save_ocr_text_heic_capture(self):
+        """Test that OCR text for a HEIC capture gets its own .txt file, not the image's name."""
+        entry = dict(self.sample_entry, screen_capture_filename='20240101 120000 - App.heic')
+
+        analyze_screen_captures.save_ocr_text(entry, 'Extracted text')
+
+        self.assertEqual(entry['screen_text_filename'], '20240101 120000 - App.txt')
+
     def test_summarization_logic(self):
         """Test summarization logic with mocked dependencies."""
         # This test verifies the summarization logic works correctly
@@ -326,11 +638,228 @@ class TestAnalyzeScreenCaptures(unittest.TestCase):
         # Check if file was saved
         self.assertTrue(os.path.exists(analyze_screen_captures.output_json))
         
-        # Check content
+        # Check content: one JSON object per line
         with open(analyze_screen_captures.output_json, 'r', encoding='utf-8') as f:
-            saved_data = json.load(f)
+            saved_data = [json.loads(line) for line in f]
         
         self.assertEqual(saved_data, test_data)
+        
+        # The temporary file is swapped into place, not left behind
+        self.assertFalse(os.path.exists(analyze_screen_captures.output_json + '.tmp'))
+    
+    def test_atomic_write_replaces_file(self):
+        """Test that atomic_write swaps in the new content and cleans up."""
+        path = os.path.join(self.temp_dir, 'data.json')
+        with open(path, 'wb') as f:
+            f.write(b'old')
+        
+        with patch('analyze_screen_captures.os.fsync') as mock_fsync:
+            analyze_screen_captures.atomic_write(path, b'new')
+            mock_fsync.assert_called_once()
+        
+        with open(path, 'rb') as f:
+            self.assertEqual(f.read(), b'new')
+        self.assertFalse(os.path.exists(path + '.tmp'))
+    
+    def test_atomic_write_without_fsync(self):
+        """Test that fsync=False still replaces the file but skips the fsync."""
+        path = os.path.join(self.temp_dir, 'data.txt')
+        
+        with patch('analyze_screen_captures.os.fsync') as mock_fsync:
+            analyze_screen_captures.atomic_write(path, b'new', fsync=False)
+            mock_fsync.assert_not_called()
+        
+        with open(path, 'rb') as f:
+            self.assertEqual(f.read(), b'new')
+    
+    def test_save_progress_safe_without_orjson(self):
+        """Test progress saving with the json module fallback."""
+        test_data = [dict(self.sample_entry, window_title='Café ☕')]
+        
+        with patch.object(analyze_screen_captures, 'ORJSON_AVAILABLE', False):
+            success = analyze_screen_captures.save_progress_safe(test_data)
+        
+        self.assertTrue(success)
+        with open(analyze_screen_captures.output_json, 'r', encoding='utf-8') as f:
+            self.assertEqual([json.loads(line) for line in f], test_data)
+    
+    def test_load_entries(self):
+        """Test loading JSON Lines entries, skipping blank lines."""
+        with open(analyze_screen_captures.output_json, 'w', encoding='utf-8') as f:
+            f.write(json.dumps(self.sample_entry) + '\n\n' + json.dumps({'app_name': 'B'}) + '\n')
+        
+        entries = analyze_screen_captures.load_entries(analyze_screen_captures.output_json)
+        
+        self.assertEqual(entries, [self.sample_entry, {'app_name': 'B'}])
+    
+    def test_load_entries_skips_partial_line(self):
+        """Test that a torn line left by an interrupted append is skipped."""
+        with open(analyze_screen_captures.output_json, 'w', encoding='utf-8') as f:
+            f.write(json.dumps(self.sample_entry) + '\n{"app_na\n' + json.dumps({'app_name': 'B'}) + '\n')
+        
+        entries = analyze_screen_captures.load_entries(analyze_screen_captures.output_json)
+        
+        self.assertEqual(entries, [self.sample_entry, {'app_name': 'B'}])
+    
+    def test_save_progress_safe_sets_aside_legacy_log(self):
+        """Test that saving entries loaded from a legacy .json log renames it."""
+        legacy_path = os.path.splitext(analyze_screen_captures.output_json)[0] + '.json'
+        with open(legacy_path, 'w', encoding='utf-8') as f:
+            json.dump([self.sample_entry], f)
+        
+        entries = analyze_screen_captures.load_entries(analyze_screen_captures.output_json)
+        analyze_screen_captures.save_progress_safe(entries)
+        
+        self.assertFalse(os.path.exists(legacy_path))
+        self.assertTrue(os.path.exists(legacy_path + '.migrated'))
+        self.assertEqual(analyze_screen_captures.load_entries(analyze_screen_captures.output_json), [self.sample_entry])
+    
+    def test_load_entries_legacy_json_array(self):
+        """Test that a legacy .json array is read when no .jsonl file exists."""
+        legacy_path = os.path.splitext(analyze_screen_captures.output_json)[0] + '.json'
+        with open(legacy_path, 'w', encoding='utf-8') as f:
+            json.dump([self.sample_entry], f, indent=2)
+        
+        entries = analyze_screen_captures.load_entries(analyze_screen_captures.output_json)
+        
+        self.assertEqual(entries, [self.sample_entry])
+    
+    def test_load_entries_missing(self):
+        """Test that a missing capture log raises FileNotFoundError."""
+        with self.assertRaises(FileNotFoundError):
+            analyze_screen_captures.load_entries(analyze_screen_captures.output_json)
+    
+    def test_main_unreadable_legacy_log(self):
+        """Test that main() reports a truncated legacy log and leaves it untouched."""
+        os.makedirs(os.path.join(self.temp_dir, 'screen-captures-20240101'))
+        legacy_path = os.path.join(self.temp_dir, 'screen_captures_ocr-20240101.json')
+        with open(legacy_path, 'w', encoding='utf-8') as f:
+            f.write('[{"app_name": "Tr')
+        
+        with patch('sys.argv', ['analyze-screen-captures.py', '--date', '20240101']):
+            analyze_screen_captures.main()
+        
+        with open(legacy_path, encoding='utf-8') as f:
+            self.assertEqual(f.read(), '[{"app_name": "Tr')
+        self.assertFalse(os.path.exists(analyze_screen_captures.output_json))
+    
+    def test_main_pipelines_ocr_into_summaries(self):
+        """Test that main() matches OCR and summary results back to their entries and saves them."""
+        input_dir = os.path.join(self.temp_dir, 'screen-captures-20240101')
+        os.makedirs(input_dir)
+        texts = {
+            'alpha': 'alpha project planning notes and meeting agenda ' * 8,
+            'beta': 'beta release checklist and deployment steps ' * 8,
+            'gamma': 'gamma browser article about database indexes ' * 8,
+        }
+        # Capture sizes set the OCR submission order; big.png and mid.png OCR to the same text
+        ocr_texts = {'big.png': texts['alpha'], 'mid.png': texts['alpha']}
+        for filename, size in (('mid.png', 200), ('small.png', 100), ('big.png', 300)):
+            with open(os.path.join(input_dir, filename), 'wb') as f:
+                f.write(filename.encode() * size)
+        with open(os.path.join(input_dir, 'page.txt'), 'w', encoding='utf-8') as f:
+            f.write(texts['gamma'])
+        # small.png was OCR'd in an earlier run, so it is not submitted again
+        analyze_screen_captures.save_cached_ocr_text(
+            analyze_screen_captures.get_file_hash(os.path.join(input_dir, 'small.png')), texts['beta'])
+        
+        log_path = os.path.join(self.temp_dir, 'screen_captures_ocr-20240101.jsonl')
+        entries = [
+            {'screen_capture_filename': 'mid.png', 'app_name': 'A'},
+            {'screen_capture_filename': 'small.png', 'app_name': 'B'},
+            {'screen_capture_filename': 'big.png', 'app_name': 'C'},
+            {'screen_text_filename': 'page.txt', 'app_name': 'Safari'},
+        ]
+        with open(log_path, 'w', encoding='utf-8') as f:
+            for entry in entries:
+                f.write(json.dumps(entry) + '\n')
+        
+        ocr_calls = []
+        
+        def fake_process_ocr(filepath, filename):
+            ocr_calls.append(filename)
+            return filename, ocr_texts[filename], True
+        
+        def fake_post(url, json=None, **kwargs):
+            name = next(name for name, text in texts.items() if text.split()[1] in json['prompt'])
+            response = MagicMock(status_code=200)
+            response.json.return_value = {'response': f'Summary {name}'}
+            return response
+        
+        # One OCR thread stands in for the process pool, so OCR runs in submission order
+        with patch('sys.argv', ['analyze-screen-captures.py', '--date', '20240101']), \
+             patch('analyze_screen_captures.ProcessPoolExecutor',
+                   lambda max_workers, initializer: ThreadPoolExecutor(max_workers=1)), \
+             patch('analyze_screen_captures.process_ocr', side_effect=fake_process_ocr), \
+             patch('analyze_screen_captures.check_ollama_status', return_value=['llama3.2:3b']), \
+             patch('analyze_screen_captures.check_memory_usage', return_value=True), \
+             patch('analyze_screen_captures.atexit.register'), \
+             patch('analyze_screen_captures.OLLAMA_SESSION.post', side_effect=fake_post) as mock_post:
+            analyze_screen_captures.main()
+        
+        # Largest capture first, and the cached capture is never OCR'd
+        self.assertEqual(ocr_calls, ['big.png', 'mid.png'])
+        # big.png and mid.png share one summary request
+        self.assertEqual(mock_post.call_count, 3)
+        
+        saved = analyze_screen_captures.load_entries(log_path)
+        self.assertEqual(
+            [(entry['app_name'], entry.get('screen_text_filename'), entry.get('activity_summary')) for entry in saved],
+            [('A', 'mid.txt', 'Summary alpha'),
+             ('B', 'small.txt', 'Summary beta'),
+             ('C', 'big.txt', 'Summary alpha'),
+             ('Safari', 'page.txt', 'Summary gamma')])
+        with open(os.path.join(input_dir, 'small.txt'), encoding='utf-8') as f:
+            self.assertEqual(f.read(), texts['beta'].strip())
+    
+    def test_flush_progress(self):
+        """Test that unsaved progress is written on flush and skipped otherwise."""
+        with patch.object(analyze_screen_captures, 'existing_data', [self.sample_entry]):
+            with patch('analyze_screen_captures.save_progress_safe', return_value=True) as mock_save:
+                analyze_screen_captures.flush_progress()
+                mock_save.assert_not_called()
+                
+                analyze_screen_captures.progress_unsaved = 3
+                analyze_screen_captures.flush_progress()
+                mock_save.assert_called_once_with([self.sample_entry])
+                self.assertEqual(analyze_screen_captures.progress_unsaved, 0)
+    
+    def test_summary_cache_loaded_once(self):
+        """Test that the summary cache is read from disk only once."""
+        with patch('analyze_screen_captures.load_summary_cache') as mock_load_cache:
+            mock_load_cache.return_value = {}
+            
+            analyze_screen_captures.get_summary_cache()
+            analyze_screen_captures.update_summary_cache('hash1', 'summary1')
+            cache = analyze_screen_captures.get_summary_cache()
+            
+            mock_load_cache.assert_called_once()
+            self.assertEqual(cache, {'hash1': 'summary1'})
+    
+    def test_flush_summary_cache_only_when_dirty(self):
+        """Test that flushing skips the disk write when nothing changed."""
+        with patch('analyze_screen_captures.load_summary_cache', return_value={}):
+            with patch('analyze_screen_captures.save_summary_cache') as mock_save_cache:
+                analyze_screen_captures.get_summary_cache()
+                analyze_screen_captures.flush_summary_cache()
+                mock_save_cache.assert_not_called()
+                
+                analyze_screen_captures.update_summary_cache('hash1', 'summary1')
+                analyze_screen_captures.flush_summary_cache()
+                analyze_screen_captures.flush_summary_cache()
+                mock_save_cache.assert_called_once_with({'hash1': 'summary1'})
+    
+    def test_save_progress_debounced(self):
+        """Test that progress is saved once per PROGRESS_SAVE_INTERVAL completions."""
+        analyze_screen_captures.last_progress_save = float('inf')  # Disable the time-based trigger
+        
+        with patch('analyze_screen_captures.save_progress_safe', return_value=True) as mock_save:
+            for _ in range(analyze_screen_captures.PROGRESS_SAVE_INTERVAL - 1):
+                analyze_screen_captures.save_progress_debounced([self.sample_entry])
+            mock_save.assert_not_called()
+            
+            analyze_screen_captures.save_progress_debounced([self.sample_entry])
+            mock_save.assert_called_once()
     
     def test_process_with_retry_success(self):
         """Test retry logic with successful function."""
@@ -516,7 +1045,9 @@ class TestAnalyzeScreenCaptures(unittest.TestCase):
                 self.assertEqual(summary, "")
                 self.assertFalse(is_cache_hit)
                 
-                # Should have saved to cache
+                # Cache writes are deferred until the cache is flushed
+                mock_save_cache.assert_not_called()
+                analyze_screen_captures.flush_summary_cache()
                 mock_save_cache.assert_called_once()
                 
                 # Check what was saved to cache
@@ -563,7 +1094,7 @@ class TestAnalyzeScreenCaptures(unittest.TestCase):
             # Mock the prompt file
             with patch('builtins.open', mock_open(read_data='Summarize this text: {text}')):
                 # Mock successful API response
-                with patch('analyze_screen_captures.requests.post') as mock_post:
+                with patch('analyze_screen_captures.OLLAMA_SESSION.post') as mock_post:
                     mock_response = MagicMock()
                     mock_response.status_code = 200
                     mock_response.json.return_value = {'response': 'This is a test summary'}
@@ -592,7 +1123,7 @@ class TestAnalyzeScreenCaptures(unittest.TestCase):
         with patch('os.path.exists') as mock_exists:
             mock_exists.return_value = True
             
-            with patch('builtins.open', mock_open(read_data='Short text')):
+            with patch('analyze_screen_captures.read_text_file', return_value='Short text'):
                 # Mock the cache to be empty initially
                 with patch('analyze_screen_captures.load_summary_cache') as mock_load_cache:
                     mock_load_cache.return_value = {}
@@ -631,7 +1162,7 @@ class TestAnalyzeScreenCaptures(unittest.TestCase):
         with patch('os.path.exists') as mock_exists:
             mock_exists.return_value = True
             
-            with patch('builtins.open', mock_open(read_data='This is a longer piece of text that should trigger the API call because it has more than 100 characters in it.')):
+            with patch('analyze_screen_captures.read_text_file', return_value='This is a longer piece of text that should trigger the API call because it has more than 100 characters in it.'):
                 # Mock the cache to have the content already cached
                 normalized_hash = analyze_screen_captures.get_normalized_content_hash('This is a longer piece of text that should trigger the API call because it has more than 100 characters in it.')
                 mock_cache = {normalized_hash: 'Cached summary text'}
@@ -36,7 +36,7 @@ class TestPrepareActivityAnalysis(unittest.TestCase):
         self.temp_dir = tempfile.mkdtemp()
         self.original_cache_dir = prepare_activity_analysis.CACHE_DIR
         prepare_activity_analysis.CACHE_DIR = self.temp_dir
-        prepare_activity_analysis.json_file = os.path.join(self.temp_dir, 'screen_captures_ocr.json')
+        prepare_activity_analysis.json_file = os.path.join(self.temp_dir, 'screen_captures_ocr.jsonl')
         prepare_activity_analysis.prompt_file = os.path.join(self.temp_dir, 'analyze_activity_prompt.txt')
         
         # Create necessary directories
@@ -70,7 +70,7 @@ class TestPrepareActivityAnalysis(unittest.TestCase):
         """Clean up test fixtures."""
         # Restore original paths
         prepare_activity_analysis.CACHE_DIR = self.original_cache_dir
-        prepare_activity_analysis.json_file = os.path.join(self.original_cache_dir, 'screen_captures_ocr.json')
+        prepare_activity_analysis.json_file = os.path.join(self.original_cache_dir, 'screen_captures_ocr.jsonl')
         prepare_activity_analysis.prompt_file = os.path.join(self.original_cache_dir, 'analyze_activity_prompt.txt')
         
         # Remove temporary directory
@@ -101,16 +101,49 @@ class TestPrepareActivityAnalysis(unittest.TestCase):
         
         self.assertIsNone(prompt)
     
+    def write_activity_lines(self, entries):
+        """Write entries to the JSON Lines activity file."""
+        with open(prepare_activity_analysis.json_file, 'w', encoding='utf-8') as f:
+            for entry in entries:
+                f.write(json.dumps(entry) + '\n')
+    
     def test_load_activity_data_success(self):
         """Test successful activity data loading."""
-        # Create JSON file
-        with open(prepare_activity_analysis.json_file, 'w', encoding='utf-8') as f:
+        self.write_activity_lines(self.sample_activity_data)
+        
+        data = prepare_activity_analysis.load_activity_data()
+        
+        self.assertEqual(data, self.sample_activity_data)
+    
+    def test_load_activity_data_drops_unused_fields(self):
+        """Test that loaded entries keep only the fields used for the CSV."""
+        self.write_activity_lines([dict(self.sample_activity_data[0], screen_capture_filename='capture.png')])
+        
+        data = prepare_activity_analysis.load_activity_data()
+        
+        self.assertEqual(data, [self.sample_activity_data[0]])
+    
+    def test_load_activity_data_legacy_array(self):
+        """Test loading a legacy JSON array when no JSON Lines file exists."""
+        legacy_file = os.path.splitext(prepare_activity_analysis.json_file)[0] + '.json'
+        with open(legacy_file, 'w', encoding='utf-8') as f:
             json.dump(self.sample_activity_data, f)
         
         data = prepare_activity_analysis.load_activity_data()
         
         self.assertEqual(data, self.sample_activity_data)
     
+    def test_load_legacy_activity_data_drops_unused_fields(self):
+        """Test that legacy entries keep only the fields used for the CSV."""
+        legacy_file = os.path.splitext(prepare_activity_analysis.json_file)[0] + '.json'
+        entry = dict(self.sample_activity_data[0], screen_capture_filename='capture.png')
+        with open(legacy_file, 'w', encoding='utf-8') as f:
+            json.dump([entry], f)
+        
+        data = prepare_activity_analysis.load_legacy_activity_data(legacy_file)
+        
+        self.assertEqual(data, [self.sample_activity_data[0]])
+    
     def test_load_activity_data_file_not_found(self):
         """Test activity data loading when file doesn't exist."""
         data = prepare_activity_analysis.load_activity_data()
@@ -118,15 +151,24 @@ class TestPrepareActivityAnalysis(unittest.TestCase):
         self.assertIsNone(data)
     
     def test_load_activity_data_json_error(self):
-        """Test activity data loading with JSON error."""
-        # Create corrupted JSON file
-        with open(prepare_activity_analysis.json_file, 'w', encoding='utf-8') as f:
-            f.write('{"invalid": json')
+        """Test activity data loading with a corrupted legacy JSON array."""
+        legacy_file = os.path.splitext(prepare_activity_analysis.json_file)[0] + '.json'
+        with open(legacy_file, 'w', encoding='utf-8') as f:
+            f.write('[{"invalid": json')
         
         data = prepare_activity_analysis.load_activity_data()
         
         self.assertIsNone(data)
     
+    def test_load_activity_data_skips_partial_line(self):
+        """Test that a torn line left by an interrupted append is skipped."""
+        with open(prepare_activity_analysis.json_file, 'w', encoding='utf-8') as f:
+            f.write(json.dumps(self.sample_activity_data[0]) + '\n{"app_na')
+        
+        data = prepare_activity_analysis.load_activity_data()
+        
+        self.assertEqual(data, self.sample_activity_data[:1])
+    
     def test_load_activity_data_exception(self):
         """Test activity data loading with exception."""
         # Create a directory with the same name as the JSON file to cause an error
@@ -148,13 +190,28 @@ class TestPrepareActivityAnalysis(unittest.TestCase):
         self.assertIn('"2024-01-01T12:05:00","Google Chrome","GitHub - username/repo","Browsing GitHub repository"', formatted)
         
         # Check that entries without summaries are handled (empty field)
-        self.assertIn('"2024-01-01T12:10:00","zoom_us","Team Meeting",', formatted)
+        self.assertIn('"2024-01-01T12:10:00","zoom_us","Team Meeting",""', formatted)
         
         # Verify CSV structure
         lines = formatted.split('\n')
         self.assertEqual(len(lines), 4)  # Header + 3 data rows
         self.assertTrue(lines[0].startswith('Timestamp,App Name,Window Title,Activity Summary'))
     
+    def test_format_activity_data_csv_escapes_quotes_and_newlines(self):
+        """Test that embedded quotes are doubled and line breaks flattened."""
+        data = [{
+            'app_name': 'Editor',
+            'timestamp': '2024-01-01T12:00:00',
+            'window_title': 'Say "hi", then leave',
+            'activity_summary': 'Line one\r\nLine two\tend'
+        }]
+        
+        formatted = prepare_activity_analysis.format_activity_data_csv(data)
+        
+        lines = formatted.split('\n')
+        self.assertEqual(len(lines), 2)
+        self.assertEqual(lines[1], '"2024-01-01T12:00:00","Editor","Say ""hi"", then leave","Line one Line two end"')
+    
     def test_format_activity_data_csv_empty(self):
         """Test formatting empty activity data."""
         formatted = prepare_activity_analysis.format_activity_data_csv([])
@@ -179,7 +236,7 @@ class TestPrepareActivityAnalysis(unittest.TestCase):
         
         formatted = prepare_activity_analysis.format_activity_data_csv(incomplete_data)
         
-        self.assertIn('"2024-01-01T12:00:00","TestApp",,', formatted)
+        self.assertIn('"2024-01-01T12:00:00","TestApp","",""', formatted)
         # Check that missing fields result in empty CSV fields
         lines = formatted.split('\n')
         self.assertEqual(len(lines), 2)  # Header + 1 data row
@@ -192,12 +249,25 @@ class TestPrepareActivityAnalysis(unittest.TestCase):
         test_text = "Test clipboard content"
         mock_paste.return_value = test_text
         
-        success = prepare_activity_analysis.copy_to_clipboard(test_text)
+        success = prepare_activity_analysis.copy_to_clipboard(test_text, verify=True)
         
         self.assertTrue(success)
         mock_copy.assert_called_once_with(test_text)
         mock_paste.assert_called_once()
     
+    @patch('prepare_activity_analysis.pyperclip.copy')
+    @patch('prepare_activity_analysis.pyperclip.paste')
+    def test_copy_to_clipboard_skips_verify_by_default(self, mock_paste, mock_copy):
+        """Test that the clipboard is not read back unless verification is enabled."""
+        test_text = "Test clipboard content"
+        
+        with patch.object(prepare_activity_analysis, 'VERIFY_CLIPBOARD', False):
+            success = prepare_activity_analysis.copy_to_clipboard(test_text)
+        
+        self.assertTrue(success)
+        mock_copy.assert_called_once_with(test_text)
+        mock_paste.assert_not_called()
+    
     @patch('prepare_activity_analysis.pyperclip.copy')
     @patch('prepare_activity_analysis.pyperclip.paste')
     def test_copy_to_clipboard_mismatch(self, mock_paste, mock_copy):
@@ -205,7 +275,7 @@ class TestPrepareActivityAnalysis(unittest.TestCase):
         test_text = "Test clipboard content"
         mock_paste.return_value = "Different content"
         
-        success = prepare_activity_analysis.copy_to_clipboard(test_text)
+        success = prepare_activity_analysis.copy_to_clipboard(test_text, verify=True)
         
         self.assertFalse(success)
         mock_copy.assert_called_once_with(test_text)
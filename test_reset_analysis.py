@@ -24,7 +24,7 @@ class TestResetAnalysis(unittest.TestCase):
         self.temp_dir = tempfile.mkdtemp()
         self.original_cache_dir = reset_analysis.CACHE_DIR
         reset_analysis.CACHE_DIR = self.temp_dir
-        reset_analysis.output_json = os.path.join(self.temp_dir, 'screen_captures_ocr.json')
+        reset_analysis.output_json = os.path.join(self.temp_dir, 'screen_captures_ocr.jsonl')
         reset_analysis.input_dir = os.path.join(self.temp_dir, 'screen-captures')
         
         # Create necessary directories
@@ -58,7 +58,7 @@ class TestResetAnalysis(unittest.TestCase):
         """Clean up test fixtures."""
         # Restore original paths
         reset_analysis.CACHE_DIR = self.original_cache_dir
-        reset_analysis.output_json = os.path.join(self.original_cache_dir, 'screen_captures_ocr.json')
+        reset_analysis.output_json = os.path.join(self.original_cache_dir, 'screen_captures_ocr.jsonl')
         # Reset input_dir to None (it will be recalculated by get_date_paths when needed)
         reset_analysis.input_dir = None
         
@@ -77,9 +77,20 @@ class TestResetAnalysis(unittest.TestCase):
     
     def test_load_json_existing_file(self):
         """Test loading JSON from existing file."""
-        # Create JSON file
+        # Create JSON Lines file
         with open(reset_analysis.output_json, 'w', encoding='utf-8') as f:
-            json.dump(self.sample_data, f)
+            for entry in self.sample_data:
+                f.write(json.dumps(entry) + '\n')
+        
+        data = reset_analysis.load_json()
+        
+        self.assertEqual(data, self.sample_data)
+    
+    def test_load_json_legacy_array(self):
+        """Test loading a legacy JSON array when no JSON Lines file exists."""
+        legacy_json = os.path.splitext(reset_analysis.output_json)[0] + '.json'
+        with open(legacy_json, 'w', encoding='utf-8') as f:
+            json.dump(self.sample_data, f, indent=2)
         
         data = reset_analysis.load_json()
         
@@ -95,6 +106,27 @@ class TestResetAnalysis(unittest.TestCase):
         
         self.assertEqual(data, [])
     
+    def test_load_json_skips_partial_line(self):
+        """Test that a torn line left by an interrupted append is skipped."""
+        with open(reset_analysis.output_json, 'w', encoding='utf-8') as f:
+            f.write(json.dumps(self.sample_data[0]) + '\n{"app_na\n')
+        
+        data = reset_analysis.load_json()
+        
+        self.assertEqual(data, self.sample_data[:1])
+    
+    def test_save_json_sets_aside_legacy_log(self):
+        """Test that saving entries loaded from a legacy .json log renames it."""
+        legacy_json = os.path.splitext(reset_analysis.output_json)[0] + '.json'
+        with open(legacy_json, 'w', encoding='utf-8') as f:
+            json.dump(self.sample_data, f)
+        
+        reset_analysis.save_json(reset_analysis.load_json())
+        
+        self.assertFalse(os.path.exists(legacy_json))
+        self.assertTrue(os.path.exists(legacy_json + '.migrated'))
+        self.assertEqual(reset_analysis.load_json(), self.sample_data)
+    
     def test_load_json_exception(self):
         """Test loading JSON with exception."""
         # Create a directory with the same name as the JSON file to cause an error
@@ -113,11 +145,23 @@ class TestResetAnalysis(unittest.TestCase):
         # Check if file was saved
         self.assertTrue(os.path.exists(reset_analysis.output_json))
         
-        # Check content
+        # Check content: one JSON object per line
         with open(reset_analysis.output_json, 'r', encoding='utf-8') as f:
-            saved_data = json.load(f)
+            saved_data = [json.loads(line) for line in f]
         
         self.assertEqual(saved_data, self.sample_data)
+        
+        # The temporary file is swapped into place, not left behind
+        self.assertFalse(os.path.exists(reset_analysis.output_json + '.tmp'))
+    
+    def test_save_json_without_orjson(self):
+        """Test that saving falls back to the json module when orjson is unavailable."""
+        with patch.object(reset_analysis, 'ORJSON_AVAILABLE', False):
+            success = reset_analysis.save_json(self.sample_data)
+            data = reset_analysis.load_json()
+        
+        self.assertTrue(success)
+        self.assertEqual(data, self.sample_data)
     
     def test_save_json_exception(self):
         """Test JSON saving with exception."""
@@ -272,6 +316,38 @@ class TestResetAnalysis(unittest.TestCase):
         # Should handle the exception gracefully
         self.assertEqual(count, 0)
     
+    def test_remove_ocr_cache(self):
+        """Test removing cached OCR results."""
+        ocr_cache_dir = os.path.join(reset_analysis.CACHE_DIR, 'ocr_cache')
+        os.makedirs(ocr_cache_dir, exist_ok=True)
+        for name in ['hash1.txt', 'hash2.txt']:
+            with open(os.path.join(ocr_cache_dir, name), 'w', encoding='utf-8') as f:
+                f.write('cached text')
+        
+        count = reset_analysis.remove_ocr_cache()
+        
+        self.assertEqual(count, 2)
+        self.assertEqual(os.listdir(ocr_cache_dir), [])
+    
+    def test_remove_ocr_cache_none_exist(self):
+        """Test removing cached OCR results when there is no cache."""
+        self.assertEqual(reset_analysis.remove_ocr_cache(), 0)
+    
+    @patch('reset_analysis.load_json')
+    @patch('reset_analysis.save_json')
+    @patch('reset_analysis.remove_ocr_cache')
+    def test_main_ocr_cache_only(self, mock_remove_ocr_cache, mock_save, mock_load):
+        """Test main function with --ocr-cache flag only."""
+        mock_load.return_value = []
+        
+        with patch('reset_analysis.get_ocr_cache_files', return_value=['hash1.txt']):
+            with patch('sys.argv', ['reset-analysis.py', '--ocr-cache', '--force']):
+                reset_analysis.main()
+        
+        # The OCR cache is cleared even without a JSON file for today
+        mock_remove_ocr_cache.assert_called_once()
+        mock_save.assert_not_called()
+    
     @patch('reset_analysis.load_json')
     @patch('reset_analysis.save_json')
     @patch('reset_analysis.remove_summary_fields')
@@ -388,6 +464,20 @@ class TestResetAnalysis(unittest.TestCase):
         mock_remove_text_filename.assert_called_once_with(self.sample_data)
         mock_save.assert_called_once_with(self.sample_data)
     
+    @patch('reset_analysis.load_json')
+    @patch('reset_analysis.save_json')
+    @patch('reset_analysis.remove_ocr_cache')
+    def test_main_all_without_removable_fields(self, mock_remove_ocr_cache, mock_save, mock_load):
+        """Test that --all does not rewrite the log when no fields need removing."""
+        mock_load.return_value = [{'app_name': 'Cursor', 'timestamp': '2024-01-01T12:00:00'}]
+        
+        with patch.object(reset_analysis, 'get_ocr_cache_files', return_value=['a.txt']):
+            with patch('sys.argv', ['reset-analysis.py', '--all', '--ocr-cache', '--force']):
+                reset_analysis.main()
+        
+        mock_remove_ocr_cache.assert_called_once()
+        mock_save.assert_not_called()
+    
     @patch('reset_analysis.load_json')
     def test_main_no_flags(self, mock_load):
         """Test main function with no flags."""
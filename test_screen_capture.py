@@ -7,6 +7,7 @@ Tests the screen capture functionality with mocked dependencies.
 import unittest
 import os
 import json
+import sys
 import tempfile
 import shutil
 from unittest.mock import patch, MagicMock, mock_open
@@ -15,6 +16,13 @@ from datetime import datetime
 # Import the module to test
 import screen_capture
 
+# CoreGraphics capture and window-list tests need PyObjC's Quartz bridge (macOS only)
+try:
+    import Quartz
+    QUARTZ_AVAILABLE = True
+except ImportError:
+    QUARTZ_AVAILABLE = False
+
 class TestScreenCapture(unittest.TestCase):
     """Test cases for screen capture functionality."""
     
@@ -23,9 +31,20 @@ class TestScreenCapture(unittest.TestCase):
         # Create temporary directories for testing
         self.temp_dir = tempfile.mkdtemp()
         self.original_cache_dir = screen_capture.CACHE_DIR
+        self.original_date = screen_capture.CURRENT_DATE
         screen_capture.CACHE_DIR = self.temp_dir
         screen_capture.SCREEN_DIR = os.path.join(self.temp_dir, 'screen-captures')
-        screen_capture.JSON_PATH = os.path.join(self.temp_dir, 'screen_captures_ocr.json')
+        screen_capture.JSON_PATH = os.path.join(self.temp_dir, 'screen_captures_ocr.jsonl')
+        
+        # Route AppleScript through the mocked osascript subprocess, not NSAppleScript
+        self.nsapplescript_patcher = patch.object(screen_capture, 'NSAPPLESCRIPT_AVAILABLE', False)
+        self.nsapplescript_patcher.start()
+        # Exercise the screencapture subprocess path unless a test opts in
+        self.cg_capture_patcher = patch.object(screen_capture, 'CG_CAPTURE_AVAILABLE', False)
+        self.cg_capture_patcher.start()
+        # Each test starts without a previous capture to compare against
+        screen_capture.last_capture_state = None
+        screen_capture.last_text_digests.clear()
         
         # Create necessary directories
         os.makedirs(screen_capture.SCREEN_DIR, exist_ok=True)
@@ -39,96 +58,311 @@ class TestScreenCapture(unittest.TestCase):
     
     def tearDown(self):
         """Clean up test fixtures."""
+        screen_capture.close_metadata_file()
+        
+        self.nsapplescript_patcher.stop()
+        self.cg_capture_patcher.stop()
+        screen_capture.compiled_scripts.clear()
+        screen_capture.script_sources.clear()
+        
         # Restore original paths
         screen_capture.CACHE_DIR = self.original_cache_dir
+        screen_capture.CURRENT_DATE = self.original_date
         screen_capture.SCREEN_DIR = os.path.join(self.original_cache_dir, 'screen-captures')
-        screen_capture.JSON_PATH = os.path.join(self.original_cache_dir, 'screen_captures_ocr.json')
+        screen_capture.JSON_PATH = os.path.join(self.original_cache_dir, 'screen_captures_ocr.jsonl')
         
         # Remove temporary directory
         shutil.rmtree(self.temp_dir, ignore_errors=True)
     
     def test_append_metadata_new_file(self):
-        """Test appending metadata to a new JSON file."""
+        """Test appending metadata to a new JSON Lines file."""
         screen_capture.append_metadata(self.sample_entry)
         
         # Check if file was created
         self.assertTrue(os.path.exists(screen_capture.JSON_PATH))
         
         # Check if data was written correctly
-        with open(screen_capture.JSON_PATH, 'r', encoding='utf-8') as f:
-            data = json.load(f)
+        data = list(screen_capture.read_all_entries())
         
         self.assertEqual(len(data), 1)
         self.assertEqual(data[0]['app_name'], 'TestApp')
     
     def test_append_metadata_existing_file(self):
-        """Test appending metadata to an existing JSON file."""
+        """Test appending metadata to an existing JSON Lines file."""
         # Create existing data
-        existing_data = [{'app_name': 'ExistingApp', 'timestamp': '2024-01-01T11:00:00'}]
+        existing_entry = {'app_name': 'ExistingApp', 'timestamp': '2024-01-01T11:00:00'}
         with open(screen_capture.JSON_PATH, 'w', encoding='utf-8') as f:
-            json.dump(existing_data, f)
+            f.write(json.dumps(existing_entry) + '\n')
         
         # Append new entry
         screen_capture.append_metadata(self.sample_entry)
         
-        # Check if data was appended correctly
+        # Check if data was appended correctly, one entry per line
         with open(screen_capture.JSON_PATH, 'r', encoding='utf-8') as f:
-            data = json.load(f)
+            lines = f.read().splitlines()
+        
+        self.assertEqual(len(lines), 2)
+        self.assertEqual(json.loads(lines[0])['app_name'], 'ExistingApp')
+        self.assertEqual(json.loads(lines[1])['app_name'], 'TestApp')
+    
+    def test_append_metadata_reuses_file_handle(self):
+        """Test that the log is opened once and reused across appends."""
+        screen_capture.append_metadata(self.sample_entry)
+        first_handle = screen_capture.metadata_file
+        
+        screen_capture.append_metadata(self.sample_entry)
+        
+        self.assertIs(screen_capture.metadata_file, first_handle)
+        self.assertEqual(len(list(screen_capture.read_all_entries())), 2)
+    
+    def test_append_metadata_after_file_replaced(self):
+        """Test that appends follow the log when another process replaces it."""
+        screen_capture.append_metadata(self.sample_entry)
+        
+        # Simulate analyze-screen-captures.py rewriting the log atomically
+        temp_path = screen_capture.JSON_PATH + '.tmp'
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            f.write(json.dumps({'app_name': 'Rewritten'}) + '\n')
+        os.replace(temp_path, screen_capture.JSON_PATH)
+        
+        screen_capture.append_metadata(self.sample_entry)
+        
+        data = list(screen_capture.read_all_entries())
+        self.assertEqual([entry['app_name'] for entry in data], ['Rewritten', 'TestApp'])
+    
+    def test_append_metadata_without_orjson(self):
+        """Test that appends fall back to the json module when orjson is unavailable."""
+        entry = dict(self.sample_entry, window_title='Café ☕')
+        
+        with patch.object(screen_capture, 'ORJSON_AVAILABLE', False):
+            screen_capture.append_metadata(entry)
+        
+        with open(screen_capture.JSON_PATH, 'rb') as f:
+            self.assertEqual(f.read(), json.dumps(entry, ensure_ascii=False).encode('utf-8') + b'\n')
+    
+    def test_append_metadata_migrates_legacy_log(self):
+        """Test that an old JSON array log is folded into the JSON Lines log once."""
+        legacy_path = os.path.splitext(screen_capture.JSON_PATH)[0] + '.json'
+        with open(legacy_path, 'w', encoding='utf-8') as f:
+            json.dump([{'app_name': 'Legacy1'}, {'app_name': 'Legacy2'}], f)
         
-        self.assertEqual(len(data), 2)
-        self.assertEqual(data[0]['app_name'], 'ExistingApp')
-        self.assertEqual(data[1]['app_name'], 'TestApp')
+        screen_capture.append_metadata(self.sample_entry)
+        
+        data = list(screen_capture.read_all_entries())
+        self.assertEqual([entry['app_name'] for entry in data], ['Legacy1', 'Legacy2', 'TestApp'])
+        self.assertFalse(os.path.exists(legacy_path))
+        self.assertTrue(os.path.exists(legacy_path + '.migrated'))
+    
+    def test_append_metadata_legacy_log_already_rewritten(self):
+        """Test that legacy entries are not duplicated when another tool already wrote them to the .jsonl."""
+        legacy_path = os.path.splitext(screen_capture.JSON_PATH)[0] + '.json'
+        with open(legacy_path, 'w', encoding='utf-8') as f:
+            json.dump([{'app_name': 'Legacy1'}, {'app_name': 'Legacy2'}], f)
+        # Simulate analyze-screen-captures.py saving summaries for the legacy entries
+        with open(screen_capture.JSON_PATH, 'w', encoding='utf-8') as f:
+            for app_name in ('Legacy1', 'Legacy2'):
+                f.write(json.dumps({'app_name': app_name, 'activity_summary': 'Summary'}) + '\n')
+        
+        screen_capture.append_metadata(self.sample_entry)
+        
+        data = list(screen_capture.read_all_entries())
+        self.assertEqual([entry['app_name'] for entry in data], ['Legacy1', 'Legacy2', 'TestApp'])
+        self.assertEqual(data[0]['activity_summary'], 'Summary')
+        self.assertFalse(os.path.exists(legacy_path))
+        self.assertTrue(os.path.exists(legacy_path + '.migrated'))
     
-    def test_append_metadata_corrupted_file(self):
-        """Test appending metadata when JSON file is corrupted."""
-        # Create corrupted JSON file
+    def test_append_metadata_after_partial_line(self):
+        """Test that an entry appended after a torn last line starts on its own line."""
         with open(screen_capture.JSON_PATH, 'w', encoding='utf-8') as f:
-            f.write('{"invalid": json')
+            f.write(json.dumps({'app_name': 'Complete'}) + '\n{"app_na')
         
-        # Should handle corruption gracefully
         screen_capture.append_metadata(self.sample_entry)
         
-        # Check if new data was written
         with open(screen_capture.JSON_PATH, 'r', encoding='utf-8') as f:
-            data = json.load(f)
+            lines = f.read().splitlines()
+        self.assertEqual(lines[1], '{"app_na')
+        self.assertEqual(json.loads(lines[2])['app_name'], 'TestApp')
+    
+    def test_read_all_entries_skips_partial_line(self):
+        """Test that a torn line is skipped instead of ending the read."""
+        with open(screen_capture.JSON_PATH, 'w', encoding='utf-8') as f:
+            f.write(json.dumps({'app_name': 'Complete'}) + '\n{"app_na\n' + json.dumps({'app_name': 'Next'}) + '\n')
         
-        self.assertEqual(len(data), 1)
-        self.assertEqual(data[0]['app_name'], 'TestApp')
+        data = list(screen_capture.read_all_entries())
+        
+        self.assertEqual([entry['app_name'] for entry in data], ['Complete', 'Next'])
+    
+    def test_append_metadata_non_ascii(self):
+        """Test that non-ASCII text is written as UTF-8."""
+        entry = dict(self.sample_entry, window_title='Café ☕')
+        
+        screen_capture.append_metadata(entry)
+        
+        data = list(screen_capture.read_all_entries())
+        self.assertEqual(data[0]['window_title'], 'Café ☕')
     
-    @patch('screen_capture.subprocess.check_output')
-    def test_get_active_app_names_success(self, mock_check_output):
+    @patch('screen_capture.subprocess.run')
+    def test_get_active_app_info_success(self, mock_run_osascript):
         """Test successful app name retrieval."""
-        mock_check_output.return_value = b'TestApp|||Test Window'
+        mock_run_osascript.return_value = MagicMock(stdout='TestApp|||Test Window|||\n')
         
-        raw_name, safe_name, window_title = screen_capture.get_active_app_names()
+        raw_name, safe_name, window_title, static_text = screen_capture.get_active_app_info()
         
         self.assertEqual(raw_name, 'TestApp')
         self.assertEqual(safe_name, 'TestApp')
         self.assertEqual(window_title, 'Test Window')
+        self.assertEqual(static_text, '')
+        # Name, title and text come from a single AppleScript call
+        mock_run_osascript.assert_called_once()
     
-    @patch('screen_capture.subprocess.check_output')
-    def test_get_active_app_names_no_separator(self, mock_check_output):
+    @patch('screen_capture.subprocess.run')
+    def test_get_active_app_info_static_text(self, mock_run_osascript):
+        """Test that comma-joined values and escaped newlines become line breaks."""
+        mock_run_osascript.return_value = MagicMock(stdout='Mail|||Inbox|||Inbox, Drafts\\nSent, 3, 4\n')
+        
+        raw_name, safe_name, window_title, static_text = screen_capture.get_active_app_info()
+        
+        self.assertEqual((raw_name, window_title), ('Mail', 'Inbox'))
+        self.assertEqual(static_text, 'Inbox\nDrafts\nSent\n3\n4')
+    
+    def test_app_info_script_only_reads_text_for_text_apps(self):
+        """Test that the app info script limits static text reads to text extraction apps."""
+        for app in screen_capture.text_extraction_apps:
+            self.assertIn(f'"{app}"', screen_capture.APP_INFO_SCRIPT)
+        self.assertNotIn('"Slack"', screen_capture.APP_INFO_SCRIPT)
+    
+    @patch('screen_capture.subprocess.run')
+    def test_get_active_app_info_no_separator(self, mock_run_osascript):
         """Test app name retrieval without separator."""
-        mock_check_output.return_value = b'TestApp'
+        mock_run_osascript.return_value = MagicMock(stdout='TestApp\n')
         
-        raw_name, safe_name, window_title = screen_capture.get_active_app_names()
+        raw_name, safe_name, window_title, static_text = screen_capture.get_active_app_info()
         
         self.assertEqual(raw_name, 'TestApp')
         self.assertEqual(safe_name, 'TestApp')
         self.assertEqual(window_title, '')
+        self.assertEqual(static_text, '')
     
-    @patch('screen_capture.subprocess.check_output')
-    def test_get_active_app_names_exception(self, mock_check_output):
+    @patch('screen_capture.subprocess.run')
+    def test_get_active_app_info_exception(self, mock_run_osascript):
         """Test app name retrieval with exception."""
-        mock_check_output.side_effect = Exception("Test exception")
+        mock_run_osascript.side_effect = screen_capture.subprocess.TimeoutExpired('osascript', 10)
         
-        raw_name, safe_name, window_title = screen_capture.get_active_app_names()
+        raw_name, safe_name, window_title, static_text = screen_capture.get_active_app_info()
         
         self.assertEqual(raw_name, 'UnknownApp')
         self.assertEqual(safe_name, 'UnknownApp')
         self.assertEqual(window_title, '')
+        self.assertEqual(static_text, '')
+    
+    def test_run_applescript_in_process_compiles_once(self):
+        """Test that NSAppleScript compiles a script once and reuses it."""
+        mock_nsapplescript = MagicMock()
+        script = mock_nsapplescript.alloc.return_value.initWithSource_.return_value
+        script.compileAndReturnError_.return_value = (True, None)
+        script.executeAndReturnError_.return_value = (MagicMock(stringValue=lambda: ' TestApp '), None)
+        
+        with patch.object(screen_capture, 'NSAPPLESCRIPT_AVAILABLE', True), \
+             patch.object(screen_capture, 'NSAppleScript', mock_nsapplescript, create=True), \
+             patch('screen_capture.subprocess.run') as mock_run_osascript:
+            first = screen_capture.run_applescript('return "TestApp"')
+            second = screen_capture.run_applescript('return "TestApp"')
+        
+        self.assertEqual(first, 'TestApp')
+        self.assertEqual(second, 'TestApp')
+        script.compileAndReturnError_.assert_called_once()
+        self.assertEqual(script.executeAndReturnError_.call_count, 2)
+        mock_run_osascript.assert_not_called()
     
-    def test_get_active_app_names_special_characters(self):
+    def test_run_applescript_in_process_error(self):
+        """Test that an in-process AppleScript error raises RuntimeError."""
+        mock_nsapplescript = MagicMock()
+        script = mock_nsapplescript.alloc.return_value.initWithSource_.return_value
+        script.compileAndReturnError_.return_value = (True, None)
+        script.executeAndReturnError_.return_value = (None, {'NSAppleScriptErrorMessage': 'failed'})
+        
+        with patch.object(screen_capture, 'NSAPPLESCRIPT_AVAILABLE', True), \
+             patch.object(screen_capture, 'NSAppleScript', mock_nsapplescript, create=True):
+            with self.assertRaises(RuntimeError):
+                screen_capture.run_applescript('error "failed"')
+    
+    @patch('screen_capture.subprocess.run')
+    def test_grab_browser_content_uses_given_app_name(self, mock_run_osascript):
+        """Test that browser extraction runs only the browser's script."""
+        mock_run_osascript.return_value = MagicMock(stdout='Page Title|||Page text\n')
+        
+        title, text = screen_capture.grab_browser_content('Google Chrome')
+        
+        self.assertEqual((title, text), ('Page Title', 'Page text'))
+        # No separate frontmost-app probe before the browser script
+        mock_run_osascript.assert_called_once()
+        self.assertTrue(mock_run_osascript.call_args[0][0][1].endswith('chrome_script.scpt'))
+    
+    @patch('screen_capture.subprocess.run')
+    def test_grab_browser_content_unsupported_app(self, mock_run_osascript):
+        """Test that unsupported apps return empty strings without running AppleScript."""
+        self.assertEqual(screen_capture.grab_browser_content('Firefox'), ('', ''))
+        mock_run_osascript.assert_not_called()
+    
+    def test_browser_scripts_strip_boilerplate(self):
+        """Test that every browser script skips nav/footer regions without changing the page."""
+        for app_name, script_path in screen_capture.browser_script_paths.items():
+            with open(script_path) as f:
+                source = f.read()
+            self.assertIn("var skip='nav,footer,aside", source, app_name)
+            self.assertIn('document.createTreeWalker(document.body', source, app_name)
+            self.assertIn('NodeFilter.FILTER_REJECT', source, app_name)
+            # The text is built from the live DOM without modifying it
+            for mutation in ('setProperty(', 'setAttribute(', 'removeAttribute(', '.remove()'):
+                self.assertNotIn(mutation, source, app_name)
+            self.assertNotIn('"document.body.innerText"', source, app_name)
+    
+    @unittest.skipUnless(QUARTZ_AVAILABLE, "Quartz not installed")
+    def test_get_focused_window_rect_prefers_owner(self):
+        """Test that the frontmost window of the named app is chosen."""
+        windows = [
+            {'kCGWindowLayer': 25, 'kCGWindowOwnerName': 'Dock', 'kCGWindowBounds': {'X': 0}},
+            {'kCGWindowLayer': 0, 'kCGWindowOwnerName': 'Overlay', 'kCGWindowBounds': {'X': 1}, 'kCGWindowNumber': 11},
+            {'kCGWindowLayer': 0, 'kCGWindowOwnerName': 'TestApp', 'kCGWindowBounds': {'X': 2}, 'kCGWindowNumber': 12},
+        ]
+        with patch.object(screen_capture.load_core_graphics(), 'CGWindowListCopyWindowInfo', return_value=windows):
+            self.assertEqual(screen_capture.get_focused_window_rect('TestApp'), {'X': 2, 'WindowID': 12})
+            # Falls back to the frontmost normal window when the owner has none
+            self.assertEqual(screen_capture.get_focused_window_rect('OtherApp'), {'X': 1, 'WindowID': 11})
+            self.assertEqual(screen_capture.get_focused_window_rect(), {'X': 1, 'WindowID': 11})
+    
+    def test_calculate_cropped_bounds(self):
+        """Test app-specific cropping and the no-crop short circuit."""
+        bounds = {'X': 0, 'Y': 0, 'Width': 1000, 'Height': 500}
+        
+        cropped = screen_capture.calculate_cropped_bounds(bounds, 'ChatGPT')
+        self.assertEqual(cropped, {'X': 140, 'Y': 0, 'Width': 860, 'Height': 500})
+        
+        self.assertIs(screen_capture.calculate_cropped_bounds(bounds, 'TestApp'), bounds)
+        # The window ID survives cropping
+        cropped = screen_capture.calculate_cropped_bounds(dict(bounds, WindowID=12), 'ChatGPT')
+        self.assertEqual(cropped['WindowID'], 12)
+        with patch.dict(screen_capture.app_cropping, {'TestApp': (0, 0, 0, 0)}):
+            self.assertIs(screen_capture.calculate_cropped_bounds(bounds, 'TestApp'), bounds)
+    
+    def test_read_png_size(self):
+        """Test reading PNG dimensions from the header."""
+        from PIL import Image
+        png_path = os.path.join(self.temp_dir, 'capture.png')
+        Image.new('RGB', (123, 45)).save(png_path)
+        
+        self.assertEqual(screen_capture.read_png_size(png_path), (123, 45))
+    
+    def test_read_png_size_not_png(self):
+        """Test that non-PNG files are rejected."""
+        path = os.path.join(self.temp_dir, 'capture.png')
+        with open(path, 'wb') as f:
+            f.write(b'not a png at all, just some bytes')
+        
+        with self.assertRaises(ValueError):
+            screen_capture.read_png_size(path)
+    
+    def test_sanitize_app_name_special_characters(self):
         """Test app name sanitization with special characters."""
         # Test with special characters
         test_cases = [
@@ -136,17 +370,18 @@ class TestScreenCapture(unittest.TestCase):
             ('Visual Studio Code', 'Visual_Studio_Code'),
             ('Test App (Beta)', 'Test_App__Beta_'),
             ('App@2.0', 'App_2_0'),
+            ('Café—Notes', 'Café_Notes'),
         ]
         
         for raw_name, expected_safe_name in test_cases:
             with self.subTest(raw_name=raw_name):
-                safe_name = "".join(c if c.isalnum() else "_" for c in raw_name)
+                safe_name = screen_capture.sanitize_app_name(raw_name)
                 self.assertEqual(safe_name, expected_safe_name)
     
     def test_write_text_entry_with_text(self):
         """Test writing text entry with content."""
         text_content = "This is test text content"
-        screen_capture.write_text_entry('TestApp', '20240101_120000', text_content, 'Test Window')
+        screen_capture.write_text_entry('TestApp', datetime(2024, 1, 1, 12, 0, 0), text_content, 'Test Window')
         
         # Check if text file was created
         expected_filename = '20240101 120000 - TestApp.txt'
@@ -159,8 +394,7 @@ class TestScreenCapture(unittest.TestCase):
         self.assertEqual(content, text_content)
         
         # Check JSON entry
-        with open(screen_capture.JSON_PATH, 'r', encoding='utf-8') as f:
-            data = json.load(f)
+        data = list(screen_capture.read_all_entries())
         
         self.assertEqual(len(data), 1)
         self.assertEqual(data[0]['screen_text_filename'], expected_filename)
@@ -169,7 +403,7 @@ class TestScreenCapture(unittest.TestCase):
     
     def test_write_text_entry_empty_text(self):
         """Test writing text entry with empty content."""
-        screen_capture.write_text_entry('TestApp', '20240101_120000', '', 'Test Window')
+        screen_capture.write_text_entry('TestApp', datetime(2024, 1, 1, 12, 0, 0), '', 'Test Window')
         
         # Check that no text file was created
         expected_filename = '20240101 120000 - TestApp.txt'
@@ -177,17 +411,68 @@ class TestScreenCapture(unittest.TestCase):
         self.assertFalse(os.path.exists(expected_path))
         
         # Check JSON entry
-        with open(screen_capture.JSON_PATH, 'r', encoding='utf-8') as f:
-            data = json.load(f)
+        data = list(screen_capture.read_all_entries())
         
         self.assertEqual(len(data), 1)
         self.assertIsNone(data[0]['screen_text_filename'])
     
+    def test_write_text_entry_skips_unchanged_text(self):
+        """Test that repeated text for the same window is logged without another text file."""
+        screen_capture.write_text_entry('TestApp', datetime(2024, 1, 1, 12, 0, 0), 'Same text', 'Test Window')
+        screen_capture.write_text_entry('TestApp', datetime(2024, 1, 1, 12, 0, 15), 'Same text', 'Test Window')
+        screen_capture.write_text_entry('TestApp', datetime(2024, 1, 1, 12, 0, 30), 'Same text', 'Other Window')
+        
+        files = sorted(os.listdir(screen_capture.SCREEN_DIR))
+        self.assertEqual(files, ['20240101 120000 - TestApp.txt', '20240101 120030 - TestApp.txt'])
+        
+        data = list(screen_capture.read_all_entries())
+        self.assertEqual(len(data), 3)
+        self.assertNotIn('screen_text_filename', data[1])
+        self.assertEqual(data[1]['timestamp'], '2024-01-01T12:00:15')
+    
+    def test_write_text_entry_truncates_long_text(self):
+        """Test that text over the cap keeps its head and tail and records the original length."""
+        text = 'a' * 60 + 'b' * 60
+        with patch.object(screen_capture, 'MAX_TEXT_CHARS', 100):
+            screen_capture.write_text_entry('TestApp', datetime(2024, 1, 1, 12, 0, 0), text, 'Test Window')
+        
+        with open(os.path.join(screen_capture.SCREEN_DIR, '20240101 120000 - TestApp.txt'), encoding='utf-8') as f:
+            saved = f.read()
+        self.assertEqual(saved, 'a' * 50 + screen_capture.TRUNCATION_MARKER + 'b' * 50)
+        
+        data = list(screen_capture.read_all_entries())
+        self.assertEqual(data[0]['original_length'], 120)
+    
+    def test_truncate_text_short_text_unchanged(self):
+        """Test that text within the cap is returned as-is."""
+        self.assertEqual(screen_capture.truncate_text('short text', limit=100), 'short text')
+    
+    def test_write_text_entry_timestamp_from_datetime(self):
+        """Test that the entry timestamp is formatted from the capture datetime."""
+        screen_capture.write_text_entry('TestApp', datetime(2024, 1, 1, 12, 0, 0, 123456), 'Some text', 'Test Window')
+        
+        data = list(screen_capture.read_all_entries())
+        self.assertEqual(data[0]['timestamp'], '2024-01-01T12:00:00')
+    
+    def test_refresh_date_paths(self):
+        """Test that paths only move to a new directory when the date changes."""
+        screen_capture.CURRENT_DATE = '20240101'
+        json_path = screen_capture.JSON_PATH
+        
+        screen_capture.refresh_date_paths(datetime(2024, 1, 1, 23, 59))
+        self.assertEqual(screen_capture.JSON_PATH, json_path)
+        
+        screen_capture.refresh_date_paths(datetime(2024, 1, 2, 0, 0))
+        self.assertEqual(screen_capture.CURRENT_DATE, '20240102')
+        self.assertEqual(screen_capture.JSON_PATH, os.path.join(self.temp_dir, 'screen_captures_ocr-20240102.jsonl'))
+        self.assertTrue(os.path.isdir(os.path.join(self.temp_dir, 'screen-captures-20240102')))
+    
+    @unittest.skipUnless(QUARTZ_AVAILABLE, "Quartz not installed")
     def test_capture_focused_window_png_fallback(self):
         """Test PNG capture fallback when no text is extracted."""
         # Mock app names to return a non-browser, non-text-extraction app
-        with patch('screen_capture.get_active_app_names') as mock_get_names:
-            mock_get_names.return_value = ('TestApp', 'TestApp', 'Test Window')
+        with patch('screen_capture.get_active_app_info') as mock_get_names:
+            mock_get_names.return_value = ('TestApp', 'TestApp', 'Test Window', '')
             
             # Mock window bounds
             with patch('screen_capture.get_focused_window_rect') as mock_bounds:
@@ -207,11 +492,12 @@ class TestScreenCapture(unittest.TestCase):
                             # Should have called screencapture
                             mock_run.assert_called_once()
 
+    @unittest.skipUnless(QUARTZ_AVAILABLE, "Quartz not installed")
     def test_capture_focused_window_high_res_success(self):
         """Test high-resolution capture when it succeeds."""
         # Mock app names to return a non-browser, non-text-extraction app
-        with patch('screen_capture.get_active_app_names') as mock_get_names:
-            mock_get_names.return_value = ('TestApp', 'TestApp', 'Test Window')
+        with patch('screen_capture.get_active_app_info') as mock_get_names:
+            mock_get_names.return_value = ('TestApp', 'TestApp', 'Test Window', '')
             
             # Mock window bounds
             with patch('screen_capture.get_focused_window_rect') as mock_bounds:
@@ -231,7 +517,196 @@ class TestScreenCapture(unittest.TestCase):
                             # Should have called screencapture
                             mock_run.assert_called_once()
     
-    @patch('screen_capture.get_active_app_names')
+    @unittest.skipUnless(QUARTZ_AVAILABLE, "Quartz not installed")
+    def test_get_display_id_for_window_multiple_displays(self):
+        """Test that each active display maps to its screencapture number, with bounds cached."""
+        def make_bounds(x, y, width, height):
+            display_bounds = MagicMock()
+            display_bounds.origin.x, display_bounds.origin.y = x, y
+            display_bounds.size.width, display_bounds.size.height = width, height
+            return display_bounds
+        
+        displays = {1: make_bounds(0, 0, 1440, 900),
+                    2: make_bounds(1440, 0, 1920, 1080),
+                    3: make_bounds(-1280, 0, 1280, 1024)}
+        
+        with patch.object(screen_capture, 'display_rects', None), \
+             patch.object(screen_capture.load_core_graphics(), 'CGGetActiveDisplayList', return_value=(0, (1, 2, 3), 3), create=True), \
+             patch.object(screen_capture.load_core_graphics(), 'CGDisplayBounds', side_effect=displays.get, create=True) as mock_display_bounds:
+            window_size = {'Width': 400, 'Height': 300}
+            on_main = screen_capture.get_display_id_for_window(dict(window_size, X=100, Y=100))
+            on_second = screen_capture.get_display_id_for_window(dict(window_size, X=1600, Y=100))
+            on_third = screen_capture.get_display_id_for_window(dict(window_size, X=-900, Y=100))
+            off_screen = screen_capture.get_display_id_for_window(dict(window_size, X=100, Y=5000))
+        
+        self.assertEqual((on_main, on_second, on_third, off_screen), (1, 2, 3, 1))
+        # Display bounds are looked up once per display, not once per capture
+        self.assertEqual(mock_display_bounds.call_count, 3)
+    
+    def test_capture_focused_window_skips_unchanged_window(self):
+        """Test that an unchanged window is logged without taking another screenshot."""
+        bounds = {'X': 100, 'Y': 100, 'Width': 100, 'Height': 100}
+        with patch('screen_capture.get_active_app_info', return_value=('TestApp', 'TestApp', 'Test Window', '')), \
+             patch('screen_capture.get_focused_window_rect', return_value=bounds), \
+             patch('screen_capture.capture_window_screencapture', return_value=True) as mock_capture:
+            screen_capture.capture_focused_window()
+            screen_capture.capture_focused_window()
+            
+            # A stale previous capture is refreshed even if nothing changed
+            screen_capture.last_capture_time -= screen_capture.UNCHANGED_RECAPTURE_SECONDS
+            screen_capture.capture_focused_window()
+        
+        self.assertEqual(mock_capture.call_count, 2)
+        entries = list(screen_capture.read_all_entries())
+        self.assertEqual(len(entries), 3)
+        self.assertNotIn('screen_capture_filename', entries[1])
+        self.assertEqual(entries[1]['window_title'], 'Test Window')
+    
+    def test_capture_focused_window_heic_format(self):
+        """Test that the configured image format sets the screenshot's extension."""
+        bounds = {'X': 100, 'Y': 100, 'Width': 100, 'Height': 100}
+        with patch.object(screen_capture, 'IMAGE_FORMAT', 'heic'), \
+             patch('screen_capture.get_active_app_info', return_value=('TestApp', 'TestApp', 'Test Window', '')), \
+             patch('screen_capture.get_focused_window_rect', return_value=bounds), \
+             patch('screen_capture.capture_window_screencapture', return_value=True) as mock_capture:
+            screen_capture.capture_focused_window()
+            self.assertEqual(screen_capture.describe_image('unused.heic'), 'HEIC')
+        
+        self.assertTrue(mock_capture.call_args[0][2].endswith(' - TestApp.heic'))
+        data = list(screen_capture.read_all_entries())
+        self.assertTrue(data[0]['screen_capture_filename'].endswith('.heic'))
+    
+    def test_capture_window_in_process(self):
+        """Test that an in-process CoreGraphics capture skips the screencapture subprocess."""
+        bounds = {'X': 100, 'Y': 100, 'Width': 100, 'Height': 100}
+        output_path = os.path.join(self.temp_dir, 'capture.png')
+        
+        def fake_capture(capture_bounds, path):
+            from PIL import Image
+            Image.new('RGB', (200, 200)).save(path)
+            return True
+        
+        with patch.object(screen_capture, 'CG_CAPTURE_AVAILABLE', True), \
+             patch('screen_capture.capture_rect_in_process', side_effect=fake_capture) as mock_capture, \
+             patch('screen_capture.subprocess.run') as mock_run:
+            success = screen_capture.capture_window_screencapture(bounds, 'TestApp', output_path)
+        
+        self.assertTrue(success)
+        # Captured to a hidden partial file, then renamed into place
+        partial_path = os.path.join(self.temp_dir, '.capture.png')
+        mock_capture.assert_called_once_with(bounds, partial_path)
+        mock_run.assert_not_called()
+        self.assertEqual(screen_capture.read_png_size(output_path), (200, 200))
+        self.assertFalse(os.path.exists(partial_path))
+    
+    @unittest.skipUnless(QUARTZ_AVAILABLE, "Quartz not installed")
+    def test_capture_rect_in_process_grayscale(self):
+        """Test that in-process captures are converted to grayscale unless --color is given."""
+        bounds = {'X': 0, 'Y': 0, 'Width': 100, 'Height': 100}
+        output_path = os.path.join(self.temp_dir, 'capture.png')
+        mock_quartz = MagicMock()
+        mock_foundation = MagicMock()
+        
+        with patch.dict(sys.modules, {'Quartz': mock_quartz, 'Foundation': mock_foundation}), \
+             patch.object(screen_capture.load_core_graphics(), 'CGWindowListCreateImage', create=True), \
+             patch('screen_capture.convert_to_grayscale') as mock_grayscale:
+            self.assertTrue(screen_capture.capture_rect_in_process(bounds, output_path))
+            mock_grayscale.assert_called_once()
+            
+            mock_grayscale.reset_mock()
+            with patch.object(screen_capture, 'args', MagicMock(color=True)):
+                screen_capture.capture_rect_in_process(bounds, output_path)
+            mock_grayscale.assert_not_called()
+    
+    @unittest.skipUnless(QUARTZ_AVAILABLE, "Quartz not installed")
+    def test_capture_rect_in_process_targets_window(self):
+        """Test that a known window ID is captured on its own rather than the whole screen rect."""
+        bounds = {'X': 0, 'Y': 0, 'Width': 100, 'Height': 100, 'WindowID': 12}
+        output_path = os.path.join(self.temp_dir, 'capture.png')
+        cg = screen_capture.load_core_graphics()
+        
+        with patch.dict(sys.modules, {'Quartz': MagicMock(), 'Foundation': MagicMock()}), \
+             patch.object(cg, 'CGWindowListCreateImage', create=True) as mock_create_image, \
+             patch('screen_capture.convert_to_grayscale'):
+            screen_capture.capture_rect_in_process(bounds, output_path)
+        
+        option, window_id = mock_create_image.call_args[0][1:3]
+        self.assertEqual(option, cg.kCGWindowListOptionIncludingWindow)
+        self.assertEqual(window_id, 12)
+    
+    def test_capture_window_in_process_falls_back(self):
+        """Test that a failed in-process capture falls back to screencapture."""
+        bounds = {'X': 100, 'Y': 100, 'Width': 100, 'Height': 100}
+        output_path = os.path.join(self.temp_dir, 'capture.png')
+        
+        with patch.object(screen_capture, 'CG_CAPTURE_AVAILABLE', True), \
+             patch('screen_capture.capture_rect_in_process', return_value=False), \
+             patch('screen_capture.get_display_id_for_window', return_value=1), \
+             patch('screen_capture.subprocess.run') as mock_run:
+            mock_run.return_value.returncode = 1
+            success = screen_capture.capture_window_screencapture(bounds, 'TestApp', output_path)
+        
+        self.assertFalse(success)
+        mock_run.assert_called_once()
+        self.assertFalse(os.path.exists(output_path))
+    
+    @patch('screen_capture.run_applescript')
+    def test_capture_focused_window_text_app_single_query(self, mock_run_applescript):
+        """Test that a text extraction app is captured from the single app info query."""
+        mock_run_applescript.return_value = 'Mail|||Inbox|||Inbox, Drafts, Sent'
+        
+        screen_capture.capture_focused_window()
+        
+        mock_run_applescript.assert_called_once_with(screen_capture.APP_INFO_SCRIPT)
+        data = list(screen_capture.read_all_entries())
+        self.assertEqual(len(data), 1)
+        with open(os.path.join(screen_capture.SCREEN_DIR, data[0]['screen_text_filename']), encoding='utf-8') as f:
+            self.assertEqual(f.read(), 'Inbox\nDrafts\nSent')
+    
+    def test_capture_focused_window_continuous_interval(self):
+        """Test that continuous mode captures, then sleeps until the next interval."""
+        with patch.object(screen_capture, 'APPKIT_AVAILABLE', False), \
+             patch('screen_capture.capture_focused_window') as mock_capture, \
+             patch('screen_capture.time.sleep', side_effect=[None, KeyboardInterrupt]) as mock_sleep:
+            screen_capture.capture_focused_window_continuous(15)
+        
+        mock_capture.assert_called_once()
+        self.assertAlmostEqual(mock_sleep.call_args_list[0][0][0], 15, delta=1)
+    
+    def test_capture_focused_window_continuous_drains_autorelease_pool(self):
+        """Test that each continuous-mode tick runs inside its own autorelease pool."""
+        mock_objc = MagicMock()
+        with patch.object(screen_capture, 'APPKIT_AVAILABLE', False), \
+             patch.object(screen_capture, 'OBJC_AVAILABLE', True), \
+             patch.object(screen_capture, 'objc', mock_objc, create=True), \
+             patch('screen_capture.capture_focused_window'), \
+             patch('screen_capture.time.sleep', side_effect=[None, KeyboardInterrupt]):
+            screen_capture.capture_focused_window_continuous(15)
+        
+        self.assertEqual(mock_objc.autorelease_pool.call_count, 2)
+        self.assertEqual(mock_objc.autorelease_pool.return_value.__exit__.call_count, 2)
+    
+    def test_capture_focused_window_continuous_app_switch(self):
+        """Test that an app switch triggers a capture before the interval elapses."""
+        callbacks = []
+        
+        def switch_app_then_stop(seconds):
+            if callbacks:
+                callbacks.pop()()
+            else:
+                raise KeyboardInterrupt
+        
+        with patch.object(screen_capture, 'APPKIT_AVAILABLE', True), \
+             patch.object(screen_capture, 'FOCUS_CHANGE_DEBOUNCE_SECONDS', 0), \
+             patch('screen_capture.watch_app_activations', side_effect=callbacks.append), \
+             patch('screen_capture.wait_for_events', side_effect=switch_app_then_stop), \
+             patch('screen_capture.capture_focused_window') as mock_capture:
+            screen_capture.capture_focused_window_continuous(15)
+        
+        # One capture at startup and one for the app switch
+        self.assertEqual(mock_capture.call_count, 2)
+    
+    @patch('screen_capture.get_active_app_info')
     def test_capture_focused_window_metadata_only(self, mock_get_names):
         """Test metadata-only capture for specific apps."""
         # Clear any existing files from previous tests
@@ -241,7 +716,7 @@ class TestScreenCapture(unittest.TestCase):
                 os.remove(file_path)
         
         # Mock app name for metadata-only app
-        mock_get_names.return_value = ('FaceTime', 'FaceTime', 'FaceTime Call')
+        mock_get_names.return_value = ('FaceTime', 'FaceTime', 'FaceTime Call', '')
         
         screen_capture.capture_focused_window()
         
@@ -250,8 +725,7 @@ class TestScreenCapture(unittest.TestCase):
         self.assertEqual(len(files), 0)
         
         # Check JSON entry
-        with open(screen_capture.JSON_PATH, 'r', encoding='utf-8') as f:
-            data = json.load(f)
+        data = list(screen_capture.read_all_entries())
         
         self.assertEqual(len(data), 1)
         self.assertEqual(data[0]['app_name'], 'FaceTime')
@@ -276,9 +750,18 @@ class TestScreenCapture(unittest.TestCase):
         self.assertEqual(len(browser_set & metadata_set), 0)
         self.assertEqual(len(text_set & metadata_set), 0)
         
+        # The lookup table covers every configured app
+        self.assertEqual(set(screen_capture.APP_CATEGORIES), browser_set | text_set | metadata_set)
+        self.assertEqual(screen_capture.APP_CATEGORIES['Safari'], 'browser')
+        self.assertEqual(screen_capture.APP_CATEGORIES['Terminal'], 'text')
+        self.assertEqual(screen_capture.APP_CATEGORIES['FaceTime'], 'metadata_only')
+        
         # Check that important apps are included
         self.assertIn('Google Chrome', browser_set)
         self.assertIn('FaceTime', metadata_set)
+        
+        # Every browser has an extraction script
+        self.assertEqual(set(screen_capture.browser_script_paths), browser_set)
 
 if __name__ == '__main__':
     unittest.main() 
\ No newline at end of file